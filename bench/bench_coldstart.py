@@ -0,0 +1,113 @@
+"""Cold-start benchmark: time from process spawn to first response.
+
+Spawns a fresh server for each run, polls /health until it answers, then
+times the first /convert (which pays for any deferred imports and opens
+the first connection to the fake Naver server). --imports prints the
+heaviest modules pulled in by `import naver2google` (python -X importtime).
+
+用法：
+    python bench/bench_coldstart.py [--server dev|gunicorn|uvicorn] [--runs 5] [--gap 0]
+    python bench/bench_coldstart.py --imports 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_naver import FakeNaver  # noqa: E402
+from run_bench import free_port, naver_env  # noqa: E402
+
+COMMANDS = {
+    "dev": [sys.executable, "naver2google.py", "--port", "{port}"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                 "--bind", "127.0.0.1:{port}"],
+    "uvicorn": [sys.executable, "-m", "uvicorn", "naver2google:asgi_app",
+                "--port", "{port}", "--log-level", "warning"],
+}
+CONVERT_INPUT = "https://map.naver.com/p/entry/place/1234"
+
+
+def import_profile(top: int) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for the heaviest imports."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import naver2google"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative)))
+    return sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+
+
+def one_run(server: str, env: dict[str, str], gap: float = 0.0) -> tuple[float, float]:
+    """Seconds to the first /health answer and for the first /convert.
+
+    The /convert is sent `gap` seconds after /health answered, like a client
+    that pings the server before converting.
+    """
+    port = free_port()
+    cmd = [part.format(port=port) for part in COMMANDS[server]]
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{server} exited with {proc.returncode}")
+            try:
+                if requests.get(f"{base}/health", timeout=1).ok:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        time.sleep(gap)
+        t = time.perf_counter()
+        requests.get(f"{base}/convert", params={"url": CONVERT_INPUT}, timeout=30)
+        return ready, time.perf_counter() - t
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="naver2google cold-start benchmark")
+    parser.add_argument("--server", choices=tuple(COMMANDS), default="gunicorn")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gap", type=float, default=0.0,
+                        help="ms between the first /health and /convert")
+    parser.add_argument("--imports", type=int, metavar="N",
+                        help="print the N heaviest imports instead")
+    args = parser.parse_args()
+
+    if args.imports:
+        print(f"{'module':<40}{'self ms':>10}{'cumul ms':>10}")
+        for name, self_us, cumulative in import_profile(args.imports):
+            print(f"{name:<40}{self_us / 1000:>10.1f}{cumulative / 1000:>10.1f}")
+        return
+
+    fake = FakeNaver(latency_ms=30, jitter_ms=0).start()
+    env = {**os.environ, **naver_env(fake.url)}
+    ready, convert = [], []
+    for _ in range(args.runs):
+        r, c = one_run(args.server, env, args.gap / 1000)
+        ready.append(r * 1000)
+        convert.append(c * 1000)
+    print(f"{args.server}: {args.runs} runs (fake Naver latency 30 ms)")
+    for label, values in (("spawn → first /health", ready), ("first /convert", convert)):
+        print(f"  {label:<24} min {min(values):7.1f}  median {statistics.median(values):7.1f}"
+              f"  max {max(values):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark: cost of parsing one input, per input kind.
+
+Compares classify() with the original multi-scan parsing (string patterns
+passed to re.search at every step). No network calls are made.
+
+用法：
+    python bench/bench_parse.py [--number 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import timeit
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naver2google import classify  # noqa: E402
+
+SAMPLES = {
+    "short_link": "[NAVER 지도]\n을지로 노가리\n서울 중구 을지로13길 19\nhttps://naver.me/FAbCdE1x",
+    "params": "https://map.naver.com/p/entry/place/1234567890?c=15.00,0,0,0,dh&lat=37.5665&lng=126.978",
+    "place": "https://map.naver.com/p/entry/place/1234567890?c=15.00,0,0,0,dh&placePath=%2Fhome",
+    "at": "https://map.naver.com/v5/search/%EC%B9%B4%ED%8E%98/@37.5665,126.978,15z",
+    "address": "https://map.naver.com/p/entry/address/14135826.1,4518381.2,"
+               "%EC%84%9C%EC%9A%B8%ED%8A%B9%EB%B3%84%EC%8B%9C?c=15.00,0,0,0,dh",
+    "nmap": "nmap://search?query=%EC%B9%B4%ED%8E%98&appname=com.example",
+    "text": "서울특별시 중구 저동2가 89",
+}
+
+
+def legacy_parse(text: str) -> tuple:
+    """The pre-classifier pipeline: every step rescans the input."""
+    m = re.search(r"(https?://(?:naver\.me|map\.naver\.com|m\.map\.naver\.com)\S+)", text)
+    if not m:
+        m = re.search(r"(nmap://\S+)", text)
+    url = m.group(1) if m else text
+    if "naver.me/" in url:
+        return (url,)
+    params = parse_qs(urlparse(url).query)
+    coords = None
+    if "lat" in params and "lng" in params:
+        try:
+            coords = float(params["lat"][0]), float(params["lng"][0])
+        except (ValueError, IndexError):
+            pass
+    place = re.search(r"/place/(\d+)", url)
+    at = re.search(r"@(-?\d+\.\d+),(-?\d+\.\d+)", url)
+    addr = re.search(r"/entry/address/[^,]+,[^,]+,(.+?)(?:\?|$)", url)
+    return (url, coords, place, at, addr and unquote(addr.group(1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse cost per input kind")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'kind':<12}{'classify µs':>14}{'legacy µs':>12}{'speedup':>10}")
+    for kind, text in SAMPLES.items():
+        assert classify(text).kind == kind, (kind, classify(text).kind)
+        new = min(timeit.repeat(lambda: classify(text), number=args.number, repeat=3))
+        old = min(timeit.repeat(lambda: legacy_parse(text), number=args.number, repeat=3))
+        new_us = new / args.number * 1e6
+        old_us = old / args.number * 1e6
+        print(f"{kind:<12}{new_us:>14.2f}{old_us:>12.2f}{old_us / new_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
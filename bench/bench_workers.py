@@ -0,0 +1,99 @@
+"""Compare gunicorn worker classes (sync, gthread, uvicorn) under load.
+
+Starts gunicorn with gunicorn.conf.py once per mode (N2G_WORKER_CLASS),
+pointed at bench/fake_naver.py, runs the run_bench workload against it and
+prints one table per mode plus a summary. Caches are off by default so
+every request waits on the (fake) upstream, which is what the worker
+class decides how to handle.
+
+用法：
+    python bench/bench_workers.py [--modes sync,gthread,uvicorn] [--workers 2]
+                                  [--threads 16] [--concurrency 32] [--latency 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_naver import FakeNaver  # noqa: E402
+from run_bench import free_port, naver_env, print_table, run_workload  # noqa: E402
+
+MODES = ("sync", "gthread", "uvicorn")
+
+
+def start_gunicorn(env: dict[str, str], port: int) -> subprocess.Popen:
+    """Start gunicorn with the repo config and wait until /health answers."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+         "--bind", f"127.0.0.1:{port}"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start within 30 s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn worker class benchmark")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--workers", type=int, help="N2G_WORKERS for every mode "
+                                                    "(default: gunicorn.conf.py sizing)")
+    parser.add_argument("--threads", type=int, help="N2G_THREADS for gthread")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per group")
+    parser.add_argument("--places", type=int, default=200, help="distinct place IDs")
+    parser.add_argument("--latency", type=float, default=100.0, help="fake Naver base ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="fake Naver tail ms")
+    parser.add_argument("--cache", action="store_true", help="keep caches on")
+    parser.add_argument("--endpoints", default="convert,go")
+    parser.add_argument("--kinds", default="short_link,place")
+    args = parser.parse_args()
+
+    fake = FakeNaver(latency_ms=args.latency, jitter_ms=args.jitter).start()
+    summary = []
+    for mode in args.modes.split(","):
+        env = {**os.environ, **naver_env(fake.url, cache=args.cache),
+               "N2G_WORKER_CLASS": mode}
+        if args.workers:
+            env["N2G_WORKERS"] = str(args.workers)
+        if args.threads:
+            env["N2G_THREADS"] = str(args.threads)
+        port = free_port()
+        proc = start_gunicorn(env, port)
+        try:
+            rows = run_workload(f"http://127.0.0.1:{port}", args.endpoints.split(","),
+                                args.kinds.split(","), args.requests, args.concurrency,
+                                args.places)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print_table(rows, f"gunicorn {mode} · concurrency {args.concurrency}"
+                          f" · fake Naver {args.latency:.0f} ms")
+        summary.append((mode, rows))
+
+    print(f"\n== summary (mean over groups)\n{'mode':<10}{'req/s':>9}{'p50 ms':>9}"
+          f"{'p99 ms':>9}{'err':>6}")
+    for mode, rows in summary:
+        n = len(rows)
+        print(f"{mode:<10}{sum(r['rps'] for r in rows) / n:>9.1f}"
+              f"{sum(r['p50'] for r in rows) / n:>9.1f}"
+              f"{sum(r['p99'] for r in rows) / n:>9.1f}{sum(r['errors'] for r in rows):>6}")
+
+
+if __name__ == "__main__":
+    main()
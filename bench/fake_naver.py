@@ -0,0 +1,155 @@
+"""Local stand-in for the Naver endpoints naver2google calls.
+
+Serves naver.me-style short links and /p/api/place/summary/{id} with
+configurable latency and error rates, so benchmarks never touch Naver.
+
+Short codes encode where they redirect to:
+    p<ID>  → /p/entry/place/<ID>
+    q<ID>  → /p/entry/place/<ID>?lat=...&lng=...
+    a<ID>  → /p/search/x/@lat,lng,15z
+Place IDs ending in 404 answer 404; everything else gets coordinates
+derived from the ID.
+
+用法：
+    python bench/fake_naver.py [--port 9800] [--latency 50] [--error-rate 0.01]
+    N2G_PLACE_API=http://127.0.0.1:9800/p/api/place/summary/{} \\
+    N2G_SHORTLINK_BASE=http://127.0.0.1:9800 python naver2google.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_SUMMARY_RE = re.compile(r"^/p/api/place/summary/(\d+)$")
+_SHORT_RE = re.compile(r"^/([pqa])(\d+)$")
+
+
+def coords_for(place_id: str) -> tuple[float, float]:
+    """Deterministic Seoul-area coordinates for a place ID."""
+    n = int(place_id)
+    return 37.4 + (n % 1000) / 5000, 126.9 + (n // 1000 % 1000) / 5000
+
+
+class FakeNaver:
+    """Threaded HTTP server; start() runs it in the background."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 30.0, jitter_ms: float = 20.0,
+                 error_rate: float = 0.0, seed: int | None = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeNaver":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _delay(self) -> tuple[float, bool]:
+        """Latency for one request (base + exponential tail) and error flag."""
+        with self._lock:
+            self.requests += 1
+            tail = self._random.expovariate(1 / self.jitter_ms) if self.jitter_ms else 0
+            failed = self._random.random() < self.error_rate
+        return (self.latency_ms + tail) / 1000, failed
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"",
+                      headers: dict | None = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    try:
+                        self.wfile.write(body)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass  # client gave up, e.g. a cancelled hedged request
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                delay, failed = fake._delay()
+                time.sleep(delay)
+                if failed:
+                    return self._send(503)
+
+                m = _SHORT_RE.match(path)
+                if m:
+                    kind, place_id = m.groups()
+                    lat, lng = coords_for(place_id)
+                    target = {
+                        "p": f"/p/entry/place/{place_id}",
+                        "q": f"/p/entry/place/{place_id}?lat={lat}&lng={lng}",
+                        "a": f"/p/search/x/@{lat},{lng},15z",
+                    }[kind]
+                    return self._send(302, headers={"Location": fake.url + target})
+
+                m = _SUMMARY_RE.match(path)
+                if m:
+                    place_id = m.group(1)
+                    if place_id.endswith("404"):
+                        return self._send(404)
+                    lat, lng = coords_for(place_id)
+                    body = json.dumps({"data": {"placeDetail": {
+                        "name": f"장소 {place_id}",
+                        "coordinate": {"latitude": lat, "longitude": lng},
+                    }}}).encode()
+                    return self._send(200, body, {"Content-Type": "application/json"})
+
+                if path.startswith("/p/"):
+                    return self._send(200)  # redirect targets
+                return self._send(404)
+
+            do_HEAD = do_GET
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fake Naver server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9800)
+    parser.add_argument("--latency", type=float, default=30.0, help="base latency (ms)")
+    parser.add_argument("--jitter", type=float, default=20.0, help="mean extra latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 503")
+    args = parser.parse_args()
+    fake = FakeNaver(args.host, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"fake Naver on {fake.url}")
+    print(f"  N2G_PLACE_API={fake.url}/p/api/place/summary/{{}}")
+    print(f"  N2G_SHORTLINK_BASE={fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
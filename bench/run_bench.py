@@ -0,0 +1,198 @@
+"""Offline throughput / latency benchmark for /convert, /go and /convert/batch.
+
+Starts bench/fake_naver.py in-process, points PLACE_API and the short-link
+host at it, serves naver2google (Flask or ASGI) on a local port, then
+drives every endpoint × input kind at a fixed concurrency and reports
+req/s and p50/p95/p99 latency.
+
+用法：
+    python bench/run_bench.py [--server flask|asgi] [--concurrency 16]
+                              [--requests 200] [--places 50] [--no-cache]
+    # 測試外部啟動的伺服器（需以 fake Naver 的環境變數啟動）
+    python bench/run_bench.py --target http://127.0.0.1:8585 --naver http://127.0.0.1:9800
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_naver import FakeNaver  # noqa: E402
+
+KINDS = ("short_link", "params", "place", "at", "address", "text")
+ENDPOINTS = ("convert", "go", "batch")
+
+
+def make_input(kind: str, i: int, places: int) -> str:
+    """The i-th input of a kind; place IDs cycle through `places` values."""
+    place_id = 1000 + i % places
+    return {
+        "short_link": f"[NAVER 지도]\n장소\nhttps://naver.me/p{place_id}",
+        "params": f"https://map.naver.com/p/entry/place/{place_id}?lat=37.5&lng=127.0",
+        "place": f"https://map.naver.com/p/entry/place/{place_id}",
+        "at": f"https://map.naver.com/v5/search/x/@37.{place_id},126.978,15z",
+        "address": "https://map.naver.com/p/entry/address/1,2,"
+                   "%EC%84%9C%EC%9A%B8%ED%8A%B9%EB%B3%84%EC%8B%9C",
+        "text": "서울특별시 중구 저동2가 89",
+    }[kind]
+
+
+def naver_env(naver_url: str, cache: bool = True) -> dict[str, str]:
+    """Environment that points naver2google at a fake Naver server."""
+    env = {
+        "N2G_PLACE_API": f"{naver_url}/p/api/place/summary/{{}}",
+        "N2G_SHORTLINK_BASE": naver_url,
+        "N2G_SHORTLINK_DB": "",
+        "N2G_RATE_LIMIT": "0",
+    }
+    if not cache:
+        env.update(N2G_PLACE_CACHE_SIZE="0", N2G_SHORTLINK_CACHE_SIZE="0")
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_process(kind: str) -> str:
+    """Serve naver2google in a background thread; returns its base URL."""
+    import naver2google
+
+    port = free_port()
+    if kind == "asgi":
+        import uvicorn
+
+        config = uvicorn.Config(naver2google.asgi_app, host="127.0.0.1",
+                                port=port, log_level="warning")
+        server = uvicorn.Server(config)
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+    else:
+        from werkzeug.serving import make_server
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", port, naver2google.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_group(target: str, endpoint: str, kind: str, n: int,
+              concurrency: int, places: int, batch_size: int) -> dict:
+    """Send n requests for one endpoint/kind; return a result row."""
+    local = threading.local()
+    counter = itertools.count()
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        i = next(counter)
+        start = time.perf_counter()
+        if endpoint == "batch":
+            kinds = KINDS if kind == "mixed" else (kind,)
+            body = [make_input(kinds[j % len(kinds)], i * batch_size + j, places)
+                    for j in range(batch_size)]
+            resp = session.post(f"{target}/convert/batch", data=json.dumps(body))
+        else:
+            url = quote(make_input(kind, i, places))
+            resp = session.get(f"{target}/{endpoint}?url={url}", allow_redirects=False)
+        elapsed = time.perf_counter() - start
+        return elapsed, resp.status_code >= 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - start
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        "endpoint": endpoint, "kind": kind, "n": n,
+        "errors": sum(s[1] for s in samples),
+        "rps": n / wall if wall else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def run_workload(target: str, endpoints=ENDPOINTS, kinds=KINDS, n: int = 200,
+                 concurrency: int = 16, places: int = 50,
+                 batch_size: int = 20) -> list[dict]:
+    rows = []
+    for endpoint in endpoints:
+        group_kinds = ("mixed",) if endpoint == "batch" else kinds
+        batches = max(1, n // batch_size) if endpoint == "batch" else n
+        for kind in group_kinds:
+            rows.append(run_group(target, endpoint, kind, batches,
+                                  concurrency, places, batch_size))
+    return rows
+
+
+def print_table(rows: list[dict], title: str = "") -> None:
+    if title:
+        print(f"\n== {title}")
+    print(f"{'endpoint':<9}{'kind':<12}{'n':>6}{'err':>5}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for r in rows:
+        print(f"{r['endpoint']:<9}{r['kind']:<12}{r['n']:>6}{r['errors']:>5}"
+              f"{r['rps']:>9.1f}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="offline naver2google benchmark")
+    parser.add_argument("--server", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--target", help="benchmark an already running server")
+    parser.add_argument("--naver", help="use an already running fake Naver server")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per group")
+    parser.add_argument("--places", type=int, default=50, help="distinct place IDs")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=30.0, help="fake Naver base ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="fake Naver tail ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-cache", action="store_true", help="disable caches")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    args = parser.parse_args()
+
+    naver_url = args.naver
+    if naver_url is None:
+        fake = FakeNaver(latency_ms=args.latency, jitter_ms=args.jitter,
+                         error_rate=args.error_rate).start()
+        naver_url = fake.url
+    target = args.target
+    if target is None:
+        os.environ.update(naver_env(naver_url, cache=not args.no_cache))
+        target = serve_in_process(args.server)
+
+    rows = run_workload(target, args.endpoints.split(","), args.kinds.split(","),
+                        args.requests, args.concurrency, args.places, args.batch_size)
+    print_table(rows, f"{args.target or args.server} · concurrency {args.concurrency}"
+                      f" · {args.places} places · cache {'off' if args.no_cache else 'on'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""gunicorn settings for naver2google.
+
+gunicorn reads ./gunicorn.conf.py automatically; Procfile and render.yaml
+also pass it explicitly with -c. The app is chosen here too (wsgi_app), so
+start it without a positional app argument:
+
+    gunicorn -c gunicorn.conf.py --bind 0.0.0.0:$PORT
+
+Worker class and sizing come from N2G_WORKER_CLASS, N2G_WORKERS,
+N2G_THREADS, N2G_WORKER_MEMORY and N2G_KEEPALIVE (see README).
+"""
+
+import gc
+import math
+import os
+import tempfile
+
+WORKER_CLASSES = {
+    "sync": ("sync", "naver2google:app"),
+    "gthread": ("gthread", "naver2google:app"),
+    "uvicorn": ("uvicorn.workers.UvicornWorker", "naver2google:asgi_app"),
+}
+WORKER_CLASS = os.environ.get("N2G_WORKER_CLASS", "gthread")
+WORKER_MEMORY = float(os.environ.get("N2G_WORKER_MEMORY", "80"))  # MB
+KEEPALIVE = int(os.environ.get("N2G_KEEPALIVE", "75"))
+# Same defaults as naver2google: one upstream call may take TIMEOUT_MAX
+# seconds per attempt, and is attempted RETRIES + 1 times.
+TIMEOUT_MAX = float(os.environ.get("N2G_TIMEOUT_MAX", "10"))
+RETRIES = int(os.environ.get("N2G_RETRIES", "2"))
+POOL_SIZE = int(os.environ.get("N2G_POOL_SIZE", "16"))
+
+if WORKER_CLASS not in WORKER_CLASSES:
+    raise ValueError(f"N2G_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, "
+                     f"not {WORKER_CLASS!r}")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cpu_limit():
+    """CPUs this container may use: affinity, capped by a cgroup CPU quota."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    quota = _read("/sys/fs/cgroup/cpu.max")                        # cgroup v2
+    if quota is None:                                              # cgroup v1
+        v1 = [_read(f"/sys/fs/cgroup/cpu/cpu.cfs_{name}_us") for name in ("quota", "period")]
+        quota = v1[0] + v1[1] if all(v1) else None
+    if quota and quota[0] not in ("max", "-1"):
+        cpus = min(cpus, math.ceil(int(quota[0]) / int(quota[1])))
+    return max(1, cpus or 1)
+
+
+def memory_limit():
+    """Bytes of memory available: the cgroup limit or physical RAM."""
+    limit = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in ("/sys/fs/cgroup/memory.max",                      # cgroup v2
+                 "/sys/fs/cgroup/memory/memory.limit_in_bytes"):   # cgroup v1
+        value = _read(path)
+        if value and value[0].isdigit():
+            limit = min(limit, int(value[0]))
+    return limit
+
+
+def default_workers(worker_class, cpus, memory):
+    """Worker count for this machine.
+
+    A sync worker blocks for a whole Naver round trip, so it needs more
+    processes than cores; gthread and uvicorn wait on Naver concurrently
+    inside one process, so one per core keeps the in-process caches large.
+    Either way, stay within the memory limit (leaving room for the master).
+    """
+    wanted = 2 * cpus + 1 if worker_class == "sync" else cpus
+    fits = int(memory / 2**20 / WORKER_MEMORY) - 1
+    return max(1, min(wanted, fits))
+
+
+worker_class, wsgi_app = WORKER_CLASSES[WORKER_CLASS]
+workers = int(os.environ.get("N2G_WORKERS") or os.environ.get("WEB_CONCURRENCY")
+              or default_workers(WORKER_CLASS, cpu_limit(), memory_limit()))
+# Threads beyond the per-host pool size would open unpooled connections.
+threads = int(os.environ.get("N2G_THREADS") or POOL_SIZE) if WORKER_CLASS == "gthread" else 1
+
+# A /convert may chain two upstream calls (short link, then Place API), each
+# retried; only kill a worker that has been stuck for longer than that.
+timeout = int(2 * (RETRIES + 1) * TIMEOUT_MAX) + 5
+# On deploys, let in-flight requests finish one full upstream call.
+graceful_timeout = int((RETRIES + 1) * TIMEOUT_MAX)
+# Longer than the proxy's idle timeout (60 s on most load balancers), so the
+# proxy, not gunicorn, closes idle connections and never reuses a dead one.
+# Ignored by sync workers.
+keepalive = KEEPALIVE
+
+# Workers record metrics into files here (prometheus_client multiprocess
+# mode) so /metrics adds up every worker, whichever one is scraped. Must be
+# set before naver2google is imported; a directory given by the deployer
+# has to start out empty.
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="n2g-metrics-")
+
+# Import naver2google once in the master and fork the workers from it, so
+# they start without re-importing Flask and share those pages copy-on-write.
+# Per-process state (HTTP sessions, SQLite and Redis connections, thread
+# pools, the snapshot thread) is created lazily and reset in each worker
+# right after the fork (naver2google._after_fork).
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the GC's reach: collections in a
+    # worker would otherwise touch (and so copy) every shared object.
+    gc.freeze()
+    server.log.info("naver2google: %d %s worker(s) x %d thread(s), timeout %ds",
+                    workers, WORKER_CLASS, threads, timeout)
+
+
+def post_worker_init(worker):
+    # Import requests and compress the web UI in the background while the
+    # worker already accepts connections.
+    import naver2google
+
+    naver2google.start_warm_up()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's gauges; its counters stay in the totals.
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -10,18 +10,45 @@ Redirect: GET /go?url=NAVER_URL[&target=apple]  → 302 to Google/Apple Maps
 
 from __future__ import annotations
 
-import argparse
+import asyncio
+import atexit
+import contextvars
+import gzip
+import hashlib
+import hmac
+import itertools
+import json
+import os
 import re
-from urllib.parse import urlparse, parse_qs, quote, unquote
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Mapping, NamedTuple
+from urllib.parse import urlsplit, parse_qs, quote, unquote
 
-import requests as http_client
-from flask import Flask, request, jsonify, redirect, Response
+from flask import Flask, g, request, Response
+import prometheus_client
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
 
 # ---------------------------------------------------------------------------
 # Naver Place Summary API (no API key needed)
 # ---------------------------------------------------------------------------
 
-PLACE_API = "https://map.naver.com/p/api/place/summary/{}"
+PLACE_API = os.environ.get(
+    "N2G_PLACE_API", "https://map.naver.com/p/api/place/summary/{}")
+# Fetch naver.me/CODE from {SHORTLINK_BASE}/CODE instead (local benchmarks)
+SHORTLINK_BASE = os.environ.get("N2G_SHORTLINK_BASE", "").rstrip("/")
 NAVER_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -33,159 +60,2340 @@ NAVER_HEADERS = {
 
 
 # ---------------------------------------------------------------------------
-# Coordinate extraction
+# Outbound HTTP session (one keep-alive pool per worker process)
+# ---------------------------------------------------------------------------
+
+POOL_HOSTS = int(os.environ.get("N2G_POOL_HOSTS", "4"))     # hosts kept pooled
+POOL_SIZE = int(os.environ.get("N2G_POOL_SIZE", "16"))      # connections per host
+POOL_BLOCK = os.environ.get("N2G_POOL_BLOCK", "0") == "1"   # hard per-host cap
+# retried by Upstream, one breaker/rate-limit/latency sample per attempt
+RETRIES = int(os.environ.get("N2G_RETRIES", "2"))
+RETRY_BACKOFF = float(os.environ.get("N2G_RETRY_BACKOFF", "0.2"))
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    """Build a session with a pooled adapter for Naver hosts."""
+    # imported on the first outbound call: requests (with its CA bundle) is
+    # the costliest import, and /health, / and cached answers never need it
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_SIZE,
+        pool_block=POOL_BLOCK,
+    )
+    session = requests.Session()
+    session.headers.update(NAVER_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_session() -> requests.Session:
+    """Return this process's session; gunicorn workers each get their own."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+
+def pool_stats() -> dict:
+    """Per-host connection reuse for this worker's session."""
+    hosts = {}
+    if _session is not None:
+        adapters = {id(a): a for a in _session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                opened = pool.num_connections
+                served = pool.num_requests
+                hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "connections": opened,
+                    "requests": served,
+                    "reused": max(served - opened, 0),
+                    "idle": sum(c is not None for c in list(pool.pool.queue))
+                            if pool.pool else 0,
+                }
+    opened = sum(h["connections"] for h in hosts.values())
+    served = sum(h["requests"] for h in hosts.values())
+    return {
+        "pool_size": POOL_SIZE,
+        "connections": opened,
+        "requests": served,
+        "reuse_rate": round(1 - opened / served, 4) if served else 0.0,
+        "hosts": hosts,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Metrics (Prometheus text format, served at /metrics)
+# ---------------------------------------------------------------------------
+
+# Under gunicorn every worker records into its own files in this directory
+# (prometheus_client multiprocess mode, set up by gunicorn.conf.py) and a
+# scrape of any worker adds them up; unset, metrics cover this process only.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+prometheus_client.disable_created_metrics()   # no *_created series per label set
+
+HTTP_REQUESTS = Counter("n2g_http_requests",
+                        "HTTP requests by route and status.", ("route", "status"))
+HTTP_SECONDS = Histogram("n2g_http_request_duration_seconds",
+                         "Time to produce a response, by route.", ("route",),
+                         buckets=LATENCY_BUCKETS)
+RESOLVED = Counter("n2g_resolved",
+                   "Conversions (single and batch) by the step that produced the result.",
+                   ("step",))
+CONVERT_SECONDS = Histogram("n2g_convert_duration_seconds",
+                            "Single conversions by the step that produced the result.",
+                            ("step",), buckets=LATENCY_BUCKETS)
+UPSTREAM_RESPONSES = Counter("n2g_upstream_responses",
+                             "Naver responses by endpoint and status code (error = no response).",
+                             ("upstream", "status"))
+UPSTREAM_SECONDS = Histogram("n2g_upstream_duration_seconds",
+                             "Naver call duration by endpoint.", ("upstream",),
+                             buckets=LATENCY_BUCKETS)
+UPSTREAM_REFUSED = Counter("n2g_upstream_refused",
+                           "Naver calls not attempted (circuit open or rate limited).",
+                           ("upstream",))
+CIRCUIT_OPEN = Gauge("n2g_upstream_circuit_open",
+                     "1 while the endpoint's circuit breaker is open in any worker.",
+                     ("upstream",), multiprocess_mode="livemax")
+UPSTREAM_TIMEOUT = Gauge("n2g_upstream_timeout_seconds",
+                         "Adaptive timeout most recently set by any worker.",
+                         ("upstream",), multiprocess_mode="livemostrecent")
+RATE_LIMIT_WAIT = Counter("n2g_rate_limit_wait_seconds",
+                          "Time calls spent queued by the outbound rate limiter.",
+                          ("upstream",))
+CACHE_HITS = Counter("n2g_cache_hits", "Cache hits.", ("cache",))
+CACHE_MISSES = Counter("n2g_cache_misses", "Cache misses.", ("cache",))
+SINGLEFLIGHT_SHARED = Counter("n2g_singleflight_shared",
+                              "Lookups that reused another request's in-flight call.",
+                              ("key",))
+PLACE_HEDGED = Counter("n2g_place_hedged", "Hedged (duplicate) Place API requests sent.")
+PLACE_REFRESH = Counter("n2g_place_refresh", "Background refreshes of stale place entries.")
+
+
+# ---------------------------------------------------------------------------
+# Request tracing (Server-Timing header, optional JSON log)
+# ---------------------------------------------------------------------------
+
+TRACE_LOG = os.environ.get("N2G_TRACE_LOG", "0") == "1"   # one JSON line per request
+
+
+class Trace:
+    """Named stage durations of one request."""
+
+    __slots__ = ("started", "spans", "degraded")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, float]] = []
+        self.degraded = False   # a fallback was used because Naver failed
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}"
+                         for name, seconds in self.spans + [("total", total)])
+
+    def log(self, route: str, status: int) -> None:
+        record = {
+            "ts": round(time.time(), 3), "route": route, "status": status,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "degraded": self.degraded,
+            "spans": {name: round(seconds * 1000, 2) for name, seconds in self.spans},
+        }
+        sys.stderr.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+# Set per request by the Flask/ASGI apps; None (batch, CLI) records nothing.
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar(
+    "n2g_trace", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block into the current request's trace, if any."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append((name, time.perf_counter() - started))
+
+
+def _mark_degraded() -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.degraded = True
+
+
+def _finish_trace(trace: Trace | None, route: str, status: int,
+                  headers) -> None:
+    """Attach Server-Timing to a traced response and log it if enabled."""
+    if trace is None or not trace.spans:
+        return
+    headers["Server-Timing"] = trace.server_timing()
+    if TRACE_LOG:
+        trace.log(route, status)
+
+
+# ---------------------------------------------------------------------------
+# Upstream guards (circuit breaker + latency-adaptive timeout per endpoint)
+# ---------------------------------------------------------------------------
+
+BREAKER_FAILURES = int(os.environ.get("N2G_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.environ.get("N2G_BREAKER_RESET", "30"))
+TIMEOUT_MIN = float(os.environ.get("N2G_TIMEOUT_MIN", "1.0"))
+TIMEOUT_MAX = float(os.environ.get("N2G_TIMEOUT_MAX", "10"))
+TIMEOUT_FACTOR = float(os.environ.get("N2G_TIMEOUT_FACTOR", "3"))
+LATENCY_WINDOW = int(os.environ.get("N2G_LATENCY_WINDOW", "200"))
+# outbound requests/second per endpoint per worker (0 disables the limiter)
+RATE_LIMIT = float(os.environ.get("N2G_RATE_LIMIT", "50"))
+RATE_BURST = int(os.environ.get("N2G_RATE_BURST", "50"))
+RATE_QUEUE = int(os.environ.get("N2G_RATE_QUEUE", "200"))
+# duplicate a Place API call still running at this latency percentile (0 = off)
+HEDGE_PERCENTILE = float(os.environ.get("N2G_HEDGE_PERCENTILE", "0"))
+HEDGE_BUDGET = float(os.environ.get("N2G_HEDGE_BUDGET", "0.05"))
+HEDGE_MIN_DELAY = float(os.environ.get("N2G_HEDGE_MIN_DELAY", "0.05"))
+HEDGE_WORKERS = int(os.environ.get("N2G_HEDGE_WORKERS", "32"))
+
+
+class UpstreamError(Exception):
+    """Naver answered with something we should not cache."""
+
+
+class CallRefused(UpstreamError):
+    """The call was not attempted; callers should use their fallback."""
+
+
+class CircuitOpen(CallRefused):
+    """The endpoint has been failing."""
+
+
+class RateLimited(CallRefused):
+    """Too many calls are already queued for the endpoint."""
+
+
+class CircuitBreaker:
+    """closed → open after N consecutive failures → half-open probe → closed.
+
+    While open every call is refused immediately. After `reset_after`
+    seconds a single probe is let through; its outcome closes or re-opens
+    the circuit.
+    """
+
+    def __init__(self, failures: int, reset_after: float):
+        self.threshold = failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if (self.state == "open"
+                    and time.monotonic() - self.opened_at >= self.reset_after):
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def cancel(self) -> None:
+        """An allowed call never ran; free the half-open probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.failures = 0
+                self.state = "closed"
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.opens += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """Token bucket shared by every thread and coroutine of a worker.
+
+    reserve() takes a token immediately or books the next free one and
+    returns how long the caller must wait for it; once `max_queue` callers
+    are waiting, further calls are refused with RateLimited.
+    """
+
+    def __init__(self, rate: float, burst: int, max_queue: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.granted += 1
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise RateLimited(f"{self._waiting} calls already queued")
+            wait = (1 - self._tokens) / self.rate
+            self._tokens -= 1   # negative balance = tokens owed to the queue
+            self._waiting += 1
+            self.granted += 1
+            self.queued += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            return wait
+
+    def _done_waiting(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def wait(self, seconds: float) -> None:
+        try:
+            time.sleep(seconds)
+        finally:
+            self._done_waiting()
+
+    async def wait_async(self, seconds: float) -> None:
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._done_waiting()
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate, "burst": self.burst,
+            "granted": self.granted, "queued": self.queued,
+            "rejected": self.rejected, "waiting": self._waiting,
+            "wait_total_ms": round(self.wait_total * 1000, 1),
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+            "wait_mean_ms": round(self.wait_total / self.queued * 1000, 1)
+                            if self.queued else 0.0,
+        }
+
+
+class LatencyTracker:
+    """Sliding window of recent call durations (seconds)."""
+
+    def __init__(self, window: int):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Upstream:
+    """Circuit breaker, rate limit, latency history and adaptive timeout.
+
+    The timeout is TIMEOUT_FACTOR × observed p99, clamped to
+    [TIMEOUT_MIN, TIMEOUT_MAX]; until 20 calls have been seen it is
+    TIMEOUT_MAX. Failed and timed-out calls are sampled too, so the timeout
+    grows again when Naver slows down instead of failing forever.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET)
+        self.bucket = TokenBucket(RATE_LIMIT, RATE_BURST, RATE_QUEUE)
+        self.latency = LatencyTracker(LATENCY_WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        UPSTREAM_REFUSED.labels(name)
+        RATE_LIMIT_WAIT.labels(name)
+        self._publish()
+
+    def timeout(self) -> float:
+        p99 = self.latency.percentile(99)
+        if p99 is None or len(self.latency) < 20:
+            return TIMEOUT_MAX
+        return min(TIMEOUT_MAX, max(TIMEOUT_MIN, p99 * TIMEOUT_FACTOR))
+
+    def _admit(self) -> float:
+        """Check the breaker, then book a rate-limit token; returns the wait."""
+        if not self.breaker.allow():
+            self.rejected += 1
+            UPSTREAM_REFUSED.labels(self.name).inc()
+            raise CircuitOpen(f"{self.name} circuit open")
+        try:
+            wait = self.bucket.reserve()
+        except RateLimited:
+            self.breaker.cancel()
+            self.rejected += 1
+            UPSTREAM_REFUSED.labels(self.name).inc()
+            raise
+        self.calls += 1
+        if wait:
+            RATE_LIMIT_WAIT.labels(self.name).inc(wait)
+        return wait
+
+    def _record(self, started: float, resp) -> None:
+        """Count 5xx/429 answers and exceptions (resp=None) as failures."""
+        elapsed = time.perf_counter() - started
+        self.latency.add(elapsed)
+        UPSTREAM_SECONDS.labels(self.name).observe(elapsed)
+        UPSTREAM_RESPONSES.labels(
+            self.name, "error" if resp is None else str(resp.status_code)).inc()
+        ok = resp is not None and resp.status_code < 500 and resp.status_code != 429
+        if not ok:
+            self.errors += 1
+        self.breaker.record(ok)
+        self._publish()
+
+    def _publish(self) -> None:
+        """Export the breaker state and timeout, which change per call."""
+        CIRCUIT_OPEN.labels(self.name).set(self.breaker.state == "open")
+        UPSTREAM_TIMEOUT.labels(self.name).set(self.timeout())
+
+    def call(self, fn, *args, **kwargs):
+        """Run a requests-style call with this endpoint's timeout.
+
+        5xx answers and transport errors are retried up to RETRIES times
+        with exponential backoff. Every attempt is admitted, timed and
+        recorded on its own, so retries stop once the circuit opens.
+        """
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            queued = self._admit()
+            if queued:
+                self.bucket.wait(queued)
+            started = time.perf_counter()
+            try:
+                resp = fn(*args, timeout=self.timeout(), **kwargs)
+            except Exception:
+                self._record(started, None)
+                if attempt == RETRIES:
+                    raise
+                continue
+            self._record(started, resp)
+            if resp.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                return resp
+
+    async def call_async(self, fn, *args, **kwargs):
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            queued = self._admit()
+            try:
+                if queued:
+                    await self.bucket.wait_async(queued)
+                started = time.perf_counter()
+                resp = await fn(*args, timeout=self.timeout(), **kwargs)
+            except asyncio.CancelledError:
+                self.breaker.cancel()  # a hedged twin won; not the endpoint's fault
+                raise
+            except Exception:
+                self._record(started, None)
+                if attempt == RETRIES:
+                    raise
+                continue
+            self._record(started, resp)
+            if resp.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                return resp
+
+    def stats(self) -> dict:
+        p50 = self.latency.percentile(50)
+        p99 = self.latency.percentile(99)
+        return {
+            "state": self.breaker.state, "opens": self.breaker.opens,
+            "calls": self.calls, "errors": self.errors, "rejected": self.rejected,
+            "timeout": round(self.timeout(), 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "rate_limit": self.bucket.stats(),
+        }
+
+
+class Hedger:
+    """When to send a second, identical request for a slow call.
+
+    The hedge fires once the first attempt has run longer than the
+    endpoint's recent `percentile` latency, and only while hedges stay
+    below `budget` × calls, so it adds at most that share of upstream load.
+    """
+
+    def __init__(self, upstream: Upstream, percentile: float, budget: float):
+        self.upstream = upstream
+        self.percentile = percentile
+        self.budget = budget
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.won = 0
+        self.over_budget = 0
+
+    def delay(self) -> float | None:
+        """Seconds to wait before hedging this call; None = don't hedge."""
+        if self.percentile <= 0 or len(self.upstream.latency) < 20:
+            return None
+        with self._lock:
+            self.calls += 1
+        return max(HEDGE_MIN_DELAY, self.upstream.latency.percentile(self.percentile))
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.calls:
+                self.over_budget += 1
+                return False
+            self.hedged += 1
+        PLACE_HEDGED.inc()
+        return True
+
+    def stats(self) -> dict:
+        return {"percentile": self.percentile, "calls": self.calls,
+                "hedged": self.hedged, "won": self.won,
+                "over_budget": self.over_budget}
+
+
+_hedge_pool: ThreadPoolExecutor | None = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(HEDGE_WORKERS,
+                                             thread_name_prefix="n2g-hedge")
+        return _hedge_pool
+
+
+def _hedged(hedger: Hedger, fn, *args):
+    """Run fn(*args), racing a duplicate if it is slow; first success wins.
+
+    The losing request cannot be interrupted and finishes in the background
+    (its latency is still recorded by the Upstream).
+    """
+    delay = hedger.delay()
+    if delay is None:
+        return fn(*args)
+    started = threading.Event()
+
+    def run():
+        started.set()
+        return fn(*args)
+
+    pool = _get_hedge_pool()
+    first = pool.submit(run)
+    # Time spent queued behind a busy pool is not upstream latency: start
+    # the hedge clock only once the first attempt is actually running.
+    started.wait()
+    done, _ = wait([first], timeout=delay)
+    if done or not hedger.take():
+        return first.result()
+    second = pool.submit(fn, *args)
+    pending = {first, second}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    hedger.won += 1
+                return future.result()
+        if not pending:
+            return first.result()  # both failed: raise the original error
+
+
+async def _hedged_async(hedger: Hedger, fn, *args):
+    """Coroutine version of _hedged(); the losing request is cancelled."""
+    delay = hedger.delay()
+    if delay is None:
+        return await fn(*args)
+    first = asyncio.ensure_future(fn(*args))
+    done, _ = await asyncio.wait([first], timeout=delay)
+    if done or not hedger.take():
+        return await first
+    second = asyncio.ensure_future(fn(*args))
+    pending = {first, second}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending,
+                                               return_when=FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        hedger.won += 1
+                    return task.result()
+            if not pending:
+                return first.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_place_upstream = Upstream("place")
+_shortlink_upstream = Upstream("shortlink")
+_place_hedge = Hedger(_place_upstream, HEDGE_PERCENTILE, HEDGE_BUDGET)
+
+
+# ---------------------------------------------------------------------------
+# In-process caches
+# ---------------------------------------------------------------------------
+
+PLACE_CACHE_SIZE = int(os.environ.get("N2G_PLACE_CACHE_SIZE", "10000"))
+PLACE_TTL = float(os.environ.get("N2G_PLACE_TTL", "86400"))
+PLACE_NEGATIVE_TTL = float(os.environ.get("N2G_PLACE_NEGATIVE_TTL", "300"))
+# past the soft TTL a place is still served, but refreshed in the background;
+# past N2G_PLACE_TTL (the hard TTL) it is gone and the next lookup blocks
+PLACE_SOFT_TTL = float(os.environ.get("N2G_PLACE_SOFT_TTL", "21600"))
+REFRESH_WORKERS = int(os.environ.get("N2G_REFRESH_WORKERS", "2"))
+SHORTLINK_CACHE_SIZE = int(os.environ.get("N2G_SHORTLINK_CACHE_SIZE", "50000"))
+SHORTLINK_TTL = float(os.environ.get("N2G_SHORTLINK_TTL", str(30 * 86400)))
+# "" keeps caches in-process; redis://host:6379/0 shares them across workers
+CACHE_URL = os.environ.get("N2G_CACHE_URL", "")
+CACHE_TIMEOUT = float(os.environ.get("N2G_CACHE_TIMEOUT", "0.25"))
+SHORTLINK_DB = os.environ.get(
+    "N2G_SHORTLINK_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "shortlinks.sqlite3"),
+)
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Key → JSON-able value store with per-entry TTLs.
+
+    get() returns `default` (the _MISSING sentinel) when a key is absent, so
+    None can be cached as a real value. The *_async methods are what the
+    async engine calls; they answer inline, which suits in-memory backends,
+    and backends that do I/O override them so the event loop never blocks.
+    """
+
+    name = ""   # `cache` label on the hit/miss counters; unnamed caches are not exported
+
+    def _count(self, hits: int, misses: int) -> None:
+        if self.name:
+            CACHE_HITS.labels(self.name).inc(hits)
+            CACHE_MISSES.labels(self.name).inc(misses)
+
+    @abstractmethod
+    def get(self, key: str, default: object = _MISSING) -> object:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        ...
+
+    def get_many(self, keys: list[str]) -> dict[str, object]:
+        """Values for the keys that are present."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    @abstractmethod
+    def items(self, limit: int) -> list[tuple[str, object]]:
+        """Up to `limit` live entries, hottest first where the backend knows."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    async def get_async(self, key: str, default: object = _MISSING) -> object:
+        return (await self.get_many_async([key])).get(key, default)
+
+    async def get_many_async(self, keys: list[str]) -> dict[str, object]:
+        return self.get_many(keys)
+
+    async def set_async(self, key: str, value: object, ttl: float | None = None) -> None:
+        self.set(key, value, ttl)
+
+    async def aclose(self) -> None:
+        """Release connections bound to the running event loop."""
+
+    def after_fork(self) -> None:
+        """Drop connections inherited from the parent process."""
+
+
+class TTLCache(CacheBackend):
+    """Thread-safe LRU mapping whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float, name: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: object = _MISSING) -> object:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            hit = entry is not None
+            if hit:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._count(int(hit), int(not hit))
+        return entry[1] if hit else default
+
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def items(self, limit: int) -> list[tuple[str, object]]:
+        now = time.monotonic()
+        with self._lock:
+            live = ((key, value) for key, (expires, value)
+                    in reversed(self._data.items()) if expires > now)
+            return list(itertools.islice(live, limit))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._data), "maxsize": self.maxsize,
+            "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by every worker and instance through a Redis server.
+
+    Values are stored as JSON under `prefix` and Redis expires them. Calls
+    are bounded by N2G_CACHE_TIMEOUT; an unreachable server only ever turns
+    into cache misses, never into failed conversions.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float, name: str = ""):
+        self.url = url
+        self.prefix = prefix
+        self.ttl = ttl
+        self.name = name
+        self._client = None
+        self._aclient = None
+        self._aclient_loop: asyncio.AbstractEventLoop | None = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _redis(self):
+        if self._client is None:
+            import redis  # only needed when N2G_CACHE_URL is set
+
+            self._client = redis.Redis.from_url(
+                self.url, socket_timeout=CACHE_TIMEOUT,
+                socket_connect_timeout=CACHE_TIMEOUT,
+            )
+        return self._client
+
+    def _redis_async(self):
+        """redis.asyncio client for the running loop (the ASGI app's calls)."""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            import redis.asyncio
+
+            self._aclient = redis.asyncio.Redis.from_url(
+                self.url, socket_timeout=CACHE_TIMEOUT,
+                socket_connect_timeout=CACHE_TIMEOUT,
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    def _found(self, keys: list[str], raw: list) -> dict[str, object]:
+        found = {key: json.loads(value)
+                 for key, value in zip(keys, raw) if value is not None}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def _failed(self, keys: list[str]) -> dict[str, object]:
+        self.errors += 1
+        self.misses += len(keys)
+        self._count(0, len(keys))
+        return {}
+
+    def get(self, key: str, default: object = _MISSING) -> object:
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: list[str]) -> dict[str, object]:
+        """One MGET round trip for all keys."""
+        if not keys:
+            return {}
+        try:
+            return self._found(keys, self._redis().mget([self.prefix + key for key in keys]))
+        except Exception:  # connection, timeout or a corrupt value
+            return self._failed(keys)
+
+    async def get_many_async(self, keys: list[str]) -> dict[str, object]:
+        if not keys:
+            return {}
+        try:
+            raw = await self._redis_async().mget([self.prefix + key for key in keys])
+            return self._found(keys, raw)
+        except Exception:
+            return self._failed(keys)
+
+    def items(self, limit: int) -> list[tuple[str, object]]:
+        try:
+            client = self._redis()
+            keys = list(itertools.islice(
+                client.scan_iter(match=self.prefix + "*", count=500), limit))
+            values = client.mget(keys) if keys else []
+            return [(key.decode()[len(self.prefix):], json.loads(value))
+                    for key, value in zip(keys, values) if value is not None]
+        except Exception:
+            self.errors += 1
+            return []
+
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        ttl_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        try:
+            self._redis().set(self.prefix + key, json.dumps(value), px=max(ttl_ms, 1))
+        except Exception:
+            self.errors += 1
+
+    async def set_async(self, key: str, value: object, ttl: float | None = None) -> None:
+        ttl_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        try:
+            await self._redis_async().set(self.prefix + key, json.dumps(value),
+                                          px=max(ttl_ms, 1))
+        except Exception:
+            self.errors += 1
+
+    def after_fork(self) -> None:
+        # a client made in a preloading gunicorn master must not share its
+        # sockets with the forked workers
+        self._client = self._aclient = self._aclient_loop = None
+
+    async def aclose(self) -> None:
+        if self._aclient is not None:
+            from redis.exceptions import RedisError
+
+            client, self._aclient, self._aclient_loop = self._aclient, None, None
+            try:
+                await client.aclose()   # redis >= 5.0.1
+            except (OSError, RedisError):
+                pass  # server already gone; the pool is closed either way
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits, "misses": self.misses, "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _make_cache(name: str, namespace: str, maxsize: int, ttl: float) -> CacheBackend:
+    CACHE_HITS.labels(name)
+    CACHE_MISSES.labels(name)
+    if CACHE_URL:
+        return RedisCache(CACHE_URL, f"n2g:{namespace}:", ttl, name)
+    return TTLCache(maxsize, ttl, name)
+
+
+class ShortLinkStore:
+    """SQLite table of short code → resolved URL, shared by every worker.
+
+    The file outlives gunicorn restarts; point N2G_SHORTLINK_DB at a Render
+    persistent disk to keep it across redeploys, or set it empty to disable.
+    Disk errors are treated as misses so the store can never fail a request.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        CACHE_HITS.labels("shortlink_store")
+        CACHE_MISSES.labels("shortlink_store")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shortlinks ("
+                "code TEXT PRIMARY KEY, url TEXT NOT NULL, resolved_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def after_fork(self) -> None:
+        """Reconnect in a forked child; SQLite connections must not cross a fork."""
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def get(self, code: str) -> str | None:
+        if not self.path:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT url FROM shortlinks WHERE code = ?", (code,),
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            row = None
+        if row is None:
+            self.misses += 1
+            CACHE_MISSES.labels("shortlink_store").inc()
+            return None
+        self.hits += 1
+        CACHE_HITS.labels("shortlink_store").inc()
+        return row[0]
+
+    def set(self, code: str, url: str) -> None:
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO shortlinks VALUES (?, ?, ?)",
+                    (code, url, time.time()),
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            pass
+
+    # The async engine must not wait on SQLite's busy timeout (up to 5 s
+    # while another worker writes) on the event loop.
+    async def get_async(self, code: str) -> str | None:
+        if not self.path:
+            return None
+        return await asyncio.to_thread(self.get, code)
+
+    async def set_async(self, code: str, url: str) -> None:
+        if self.path:
+            await asyncio.to_thread(self.set, code, url)
+
+    def stats(self) -> dict:
+        return {"path": self.path, "hits": self.hits, "misses": self.misses}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    The first thread to ask for a key runs fn; threads asking while it is
+    in flight wait for that run and share its result or exception.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.calls = 0
+        self.shared = 0
+        SINGLEFLIGHT_SHARED.labels(name)
+
+    def do(self, key: str, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            SINGLEFLIGHT_SHARED.labels(self.name).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared,
+                "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines running on one event loop.
+
+    The shared call runs as its own task that every caller, the first one
+    included, awaits through shield(): a caller that is cancelled (say, a
+    streamed batch whose client went away) leaves the others waiting.
+    """
+
+    async def do(self, key: str, fn, *args):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+            SINGLEFLIGHT_SHARED.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller was cancelled
+
+
+# place_id → ((lat, lng, name) or None when Naver has no coordinates, fetched_at)
+_place_cache = _make_cache("place", "place", PLACE_CACHE_SIZE, PLACE_TTL)
+# naver.me short code → resolved map.naver.com URL (memory tier, then disk)
+_shortlink_cache = _make_cache("shortlink", "short", SHORTLINK_CACHE_SIZE, SHORTLINK_TTL)
+_shortlink_store = ShortLinkStore(SHORTLINK_DB)
+# concurrent misses for one key share a single upstream call
+_place_flight = SingleFlight("place")
+_shortlink_flight = SingleFlight("shortlink")
+_place_flight_async = AsyncSingleFlight("place_async")
+_shortlink_flight_async = AsyncSingleFlight("shortlink_async")
+
+
+# ---------------------------------------------------------------------------
+# Input classification (patterns compiled once at import)
+# ---------------------------------------------------------------------------
+
+_NAVER_URL_RE = re.compile(
+    r"https?://(?:naver\.me|map\.naver\.com|m\.map\.naver\.com)\S+")
+_NMAP_URL_RE = re.compile(r"nmap://\S+")
+_ANY_URL_RE = re.compile(f"{_NAVER_URL_RE.pattern}|{_NMAP_URL_RE.pattern}")
+_SHORT_CODE_RE = re.compile(r"naver\.me/([A-Za-z0-9]+)")
+_PLACE_ID_RE = re.compile(r"/place/(\d+)")
+_AT_COORDS_RE = re.compile(r"@(-?\d+\.\d+),(-?\d+\.\d+)")
+_ADDRESS_RE = re.compile(r"/entry/address/[^,]+,[^,]+,(.+?)(?:\?|$)")
+
+
+class ParsedUrl(NamedTuple):
+    """Everything the pipeline needs from one input, found in one pass."""
+    kind: str
+    url: str
+    short_code: str | None = None
+    params: tuple[float, float] | None = None
+    place_id: str | None = None
+    at: tuple[float, float] | None = None
+    address: str | None = None
+
+
+def _extract_url(text: str) -> str:
+    """Extract a Naver Map URL from pasted text that may contain extra lines.
+
+    Handles share text like:
+        [NAVER 地图]
+        Store Name
+        Address line
+        https://naver.me/XXXXX
+    """
+    m = _NAVER_URL_RE.search(text)
+    if m:
+        return m.group(0)
+    # Also match nmap:// scheme
+    m = _NMAP_URL_RE.search(text)
+    if m:
+        return m.group(0)
+    return text
+
+
+def _short_code(url: str) -> str | None:
+    """Extract the code from a naver.me/CODE short link."""
+    m = _SHORT_CODE_RE.search(url)
+    return m.group(1) if m else None
+
+
+def _coords_from_params(url: str) -> tuple[float, float] | None:
+    """Extract lat/lng from URL query parameters."""
+    query = urlsplit(url).query
+    if not query:
+        return None
+    params = parse_qs(query)
+    if "lat" in params and "lng" in params:
+        try:
+            return float(params["lat"][0]), float(params["lng"][0])
+        except (ValueError, IndexError):
+            pass
+    return None
+
+
+def classify(text: str) -> ParsedUrl:
+    """Identify the input kind and pull out every field later steps use.
+
+    Each pattern runs at most once, and only when its literal marker is
+    present, so plain addresses cost a few substring checks.
+    """
+    url = _extract_url(text)
+    if "naver.me/" in url:
+        return ParsedUrl("short_link", url, short_code=_short_code(url))
+
+    params = _coords_from_params(url)
+    place_id = at = address = None
+    if "/place/" in url:
+        m = _PLACE_ID_RE.search(url)
+        place_id = m.group(1) if m else None
+    if "@" in url:
+        m = _AT_COORDS_RE.search(url)
+        at = (float(m.group(1)), float(m.group(2))) if m else None
+    if "/entry/address/" in url:
+        m = _ADDRESS_RE.search(url)
+        address = unquote(m.group(1)).strip() if m else None
+
+    if params:
+        kind = "params"
+    elif place_id:
+        kind = "place"
+    elif at:
+        kind = "at"
+    elif address is not None:
+        kind = "address"
+    elif url.startswith("nmap://"):
+        kind = "nmap"
+    else:
+        kind = "text"
+    return ParsedUrl(kind, url, None, params, place_id, at, address)
+
+
+# ---------------------------------------------------------------------------
+# Coordinate extraction
+# ---------------------------------------------------------------------------
+
+def _short_link_request_url(url: str) -> str:
+    code = _short_code(url) if SHORTLINK_BASE else None
+    return f"{SHORTLINK_BASE}/{code}" if code else url
+
+
+def _short_link_from_response(resp) -> str:
+    """Final URL of a followed short link (requests or httpx response)."""
+    if resp.status_code >= 500 or resp.status_code == 429:
+        raise UpstreamError(f"short link returned {resp.status_code}")
+    return str(resp.url)
+
+
+def _fetch_short_link(url: str) -> str:
+    """Follow naver.me redirect over the network."""
+    resp = _shortlink_upstream.call(
+        _get_session().head, _short_link_request_url(url), allow_redirects=True)
+    return _short_link_from_response(resp)
+
+
+def _cached_short_link(code: str | None) -> str | None:
+    """Look a short code up in the memory tier, then the disk tier."""
+    if code is None:
+        return None
+    cached = _shortlink_cache.get(code)
+    return _stored_short_link(code) if cached is _MISSING else cached
+
+
+def _stored_short_link(code: str | None) -> str | None:
+    """The disk tier alone; a hit is copied into the memory tier."""
+    if code is None:
+        return None
+    resolved = _shortlink_store.get(code)
+    if resolved is not None:
+        _shortlink_cache.set(code, resolved)
+    return resolved
+
+
+def _pinnable(code: str | None, resolved: str) -> bool:
+    # a link that did not redirect is a bad answer; don't pin it
+    return code is not None and "naver.me/" not in resolved
+
+
+def _remember_short_link(code: str | None, resolved: str) -> None:
+    if not _pinnable(code, resolved):
+        return
+    _shortlink_store.set(code, resolved)
+    _shortlink_cache.set(code, resolved)
+
+
+def _load_short_link(code: str | None, url: str) -> str:
+    resolved = _fetch_short_link(url)
+    _remember_short_link(code, resolved)
+    return resolved
+
+
+def _resolve_short_link(url: str) -> str:
+    """Follow naver.me redirect to get the full URL (cached by short code)."""
+    code = _short_code(url)
+    resolved = _cached_short_link(code)
+    if resolved is None:
+        resolved = _shortlink_flight.do(code or url, _load_short_link, code, url)
+    return resolved
+
+
+def _uncached_short_link(url: str) -> str:
+    """_resolve_short_link() for a code the memory tier has already missed."""
+    code = _short_code(url)
+    resolved = _stored_short_link(code)
+    if resolved is None:
+        resolved = _shortlink_flight.do(code or url, _load_short_link, code, url)
+    return resolved
+
+
+def _place_from_response(resp) -> tuple[float, float, str] | None:
+    """Parse a Place Summary response (requests or httpx); None = no coords.
+
+    Unexpected status codes raise UpstreamError, so callers can tell a
+    definitive miss (safe to cache) from a transient failure.
+    """
+    if resp.status_code in (404, 410):
+        return None
+    if resp.status_code != 200:
+        raise UpstreamError(f"Place API returned {resp.status_code}")
+    data = resp.json()
+    detail = data.get("data", {}).get("placeDetail", {})
+    coord = detail.get("coordinate", {})
+    lat = coord.get("latitude")
+    lng = coord.get("longitude")
+    if lat is None or lng is None:
+        return None
+    name = detail.get("name", "")
+    return float(lat), float(lng), name
+
+
+def _fetch_place_once(place_id: str) -> tuple[float, float, str] | None:
+    resp = _place_upstream.call(_get_session().get, PLACE_API.format(place_id))
+    return _place_from_response(resp)
+
+
+def _fetch_place(place_id: str) -> tuple[float, float, str] | None:
+    """Query the Place Summary API over the network (hedged if enabled)."""
+    return _hedged(_place_hedge, _fetch_place_once, place_id)
+
+
+def _remember_place(place_id: str,
+                    result: tuple[float, float, str] | None) -> None:
+    ttl = None if result else PLACE_NEGATIVE_TTL
+    _place_cache.set(place_id, (result, time.time()), ttl)
+
+
+_refreshing: set[str] = set()
+_refresh_lock = threading.Lock()
+_refresh_pool: ThreadPoolExecutor | None = None
+_refresh_stats = {"scheduled": 0, "failed": 0}
+
+
+def _refresh_place(place_id: str) -> None:
+    try:
+        _place_flight.do(place_id, _load_place, place_id)
+    except Exception:
+        _refresh_stats["failed"] += 1  # keep serving stale until the hard TTL
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(place_id)
+
+
+def _schedule_refresh(place_id: str) -> None:
+    """Re-query a stale place on a background thread, once at a time."""
+    global _refresh_pool
+    with _refresh_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(
+                REFRESH_WORKERS, thread_name_prefix="n2g-refresh")
+        if place_id in _refreshing:
+            return
+        _refreshing.add(place_id)
+        _refresh_stats["scheduled"] += 1
+        PLACE_REFRESH.inc()
+    _refresh_pool.submit(_refresh_place, place_id)
+
+
+def _serve_place(place_id: str, entry) -> tuple[float, float, str] | None:
+    """Unpack a place cache entry, refreshing it if past the soft TTL."""
+    result, fetched_at = entry
+    if time.time() - fetched_at > PLACE_SOFT_TTL:
+        _schedule_refresh(place_id)
+    return result
+
+
+def _cached_place(place_id: str) -> object:
+    entry = _place_cache.get(place_id)
+    return entry if entry is _MISSING else _serve_place(place_id, entry)
+
+
+def _cached_places(place_ids: list[str]) -> dict[str, object]:
+    return {place_id: _serve_place(place_id, entry)
+            for place_id, entry in _place_cache.get_many(place_ids).items()}
+
+
+def _load_place(place_id: str) -> tuple[float, float, str] | None:
+    result = _fetch_place(place_id)
+    _remember_place(place_id, result)
+    return result
+
+
+def _coords_from_place_api(place_id: str) -> tuple[float, float, str] | None:
+    """Call Naver Place Summary API to get coordinates and name (cached)."""
+    cached = _cached_place(place_id)
+    return _uncached_place(place_id) if cached is _MISSING else cached
+
+
+def _uncached_place(place_id: str) -> tuple[float, float, str] | None:
+    """_coords_from_place_api() for an ID the cache has already missed."""
+    try:
+        return _place_flight.do(place_id, _load_place, place_id)
+    except Exception:
+        _mark_degraded()
+        return None
+
+
+# Shared with the generated client JavaScript (see CLIENT_SPEC)
+GOOGLE_URL = "https://www.google.com/maps?q={lat},{lng}"
+APPLE_URL = "https://maps.apple.com/?ll={lat},{lng}&q={q}"
+
+
+def _build_result(lat: float, lng: float, name: str) -> dict:
+    """Build result dict with both Google and Apple Maps URLs."""
+    label = quote(name) if name else f"{lat},{lng}"
+    return {
+        "lat": lat, "lng": lng, "name": name,
+        "google_url": GOOGLE_URL.format(lat=lat, lng=lng),
+        "apple_url": APPLE_URL.format(lat=lat, lng=lng, q=label),
+    }
+
+
+def _search_result(query: str) -> dict:
+    """Build a text-search result when no coordinates are available."""
+    return {
+        "lat": None, "lng": None, "name": query,
+        "google_url": f"https://www.google.com/maps/search/{quote(query)}",
+        "apple_url": f"https://maps.apple.com/?q={quote(query)}",
+    }
+
+
+def _resolve_step(parsed: ParsedUrl,
+                  place: tuple[float, float, str] | None) -> tuple[str, dict]:
+    """Pick the best result from a parsed URL and its Place API answer.
+
+    Returns the name of the step that produced it along with the result.
+    """
+    # Step 1: lat/lng from URL params (Place API only supplies the name)
+    if parsed.params:
+        lat, lng = parsed.params
+        return "params", _build_result(lat, lng, place[2] if place else "")
+
+    # Step 2: Place ID → API
+    if place:
+        lat, lng, name = place
+        return "place_api", _build_result(lat, lng, name)
+
+    # Step 3: try @lat,lng pattern
+    if parsed.at:
+        lat, lng = parsed.at
+        return "at", _build_result(lat, lng, "")
+
+    # Step 3.5: address entry URL (/entry/address/CODE,CODE,address)
+    if parsed.address is not None:
+        return "address", _search_result(parsed.address)
+
+    # Step 4: fallback — pass as search query
+    return "fallback", _search_result(unquote(parsed.url))
+
+
+def _resolve(parsed: ParsedUrl,
+             place: tuple[float, float, str] | None) -> dict:
+    step, result = _resolve_step(parsed, place)
+    RESOLVED.labels(step).inc()
+    return result
+
+
+def _resolve_timed(parsed: ParsedUrl, place: tuple[float, float, str] | None,
+                   started: float) -> dict:
+    """_resolve() for a single conversion, timed from `started` by step."""
+    step, result = _resolve_step(parsed, place)
+    RESOLVED.labels(step).inc()
+    CONVERT_SECONDS.labels(step).observe(time.perf_counter() - started)
+    return result
+
+
+def _share_text_fallback(raw: str, url: str, error: Exception) -> ParsedUrl:
+    """Search by the share text's name/address lines when naver.me fails.
+
+    Any failure counts: refused calls, 5xx answers and transport errors
+    alike. Re-raises `error` when there is no text to use.
+    """
+    lines = (line.strip() for line in raw.replace(url, "").splitlines())
+    query = " ".join(line for line in lines
+                     if line and not (line.startswith("[") and line.endswith("]")))
+    if not query:
+        raise error
+    _mark_degraded()
+    return ParsedUrl("text", query)
+
+
+def _needs_place_api(parsed: ParsedUrl, with_name: bool) -> bool:
+    """Whether the Place API can change the result for this URL."""
+    return bool(parsed.place_id) and (parsed.params is None or with_name)
+
+
+def convert(naver_url: str, with_name: bool = True) -> dict:
+    """Main conversion: Naver URL → {lat, lng, name, google_url, apple_url}.
+
+    The URL is parsed once and the Place API is called at most once. With
+    with_name=False, URLs that already carry lat/lng skip the API entirely.
+    """
+    started = time.perf_counter()
+    raw = naver_url.strip()
+    if not raw:
+        return {"error": "空的輸入"}
+
+    # Step 0a: extract URL from multi-line share text and classify it
+    with span("extract"):
+        parsed = classify(raw)
+
+    # Step 0b: resolve short links
+    if parsed.kind == "short_link":
+        try:
+            with span("short_link"):
+                resolved = _resolve_short_link(parsed.url)
+            with span("parse"):
+                parsed = classify(resolved)
+        except Exception as e:
+            parsed = _share_text_fallback(raw, parsed.url, e)
+
+    place = None
+    if _needs_place_api(parsed, with_name):
+        with span("place_api"):
+            place = _coords_from_place_api(parsed.place_id)
+    with span("build"):
+        return _resolve_timed(parsed, place, started)
+
+
+# ---------------------------------------------------------------------------
+# Client-side conversion (generated JavaScript)
+# ---------------------------------------------------------------------------
+
+# The rules convert() applies to URLs that carry their own coordinates. The
+# web UI and the Scriptable script get them as JavaScript from client_js(),
+# so lat/lng and @lat,lng links convert without a request.
+CLIENT_SPEC = {
+    # inputs outside this (non-ASCII, exotic whitespace) always go to the
+    # server, where Python and JS regex/strip semantics could differ
+    "token": r"^[\t\n\r ]*[\x21-\x7e]+[\t\n\r ]*$",
+    "naver_url": _NAVER_URL_RE.pattern,
+    "nmap_url": _NMAP_URL_RE.pattern,
+    "short_link": "naver.me/",
+    "place_id": _PLACE_ID_RE.pattern,
+    "at": _AT_COORDS_RE.pattern,
+    # lat/lng values JS parses exactly like float(); others go to the server
+    "decimal": r"^-?\d+(?:\.\d+)?$",
+    "google_url": GOOGLE_URL,
+    "apple_url": APPLE_URL,
+}
+
+_CLIENT_JS = r"""
+const N2G_SPEC = %s;
+
+// repr() of a Python float, so coordinates print exactly as the server's
+function n2gPyFloat(x) {
+  if (Object.is(x, -0)) return "-0.0";
+  const m = x.toExponential().match(/^(-?)(\d)(?:\.(\d+))?e([+-]\d+)$/);
+  const sign = m[1], digits = m[2] + (m[3] || ""), exp = parseInt(m[4], 10);
+  if (exp < -4 || exp >= 16) {
+    const e = Math.abs(exp);
+    return sign + digits[0] + (digits.length > 1 ? "." + digits.slice(1) : "") +
+      "e" + (exp < 0 ? "-" : "+") + (e < 10 ? "0" + e : e);
+  }
+  if (exp < 0) return sign + "0." + "0".repeat(-exp - 1) + digits;
+  if (digits.length > exp + 1) {
+    return sign + digits.slice(0, exp + 1) + "." + digits.slice(exp + 1);
+  }
+  return sign + digits + "0".repeat(exp + 1 - digits.length) + ".0";
+}
+
+// lat/lng query params: [lat, lng], null (none) or undefined (ask the server)
+function n2gParams(url) {
+  const q = url.split("#")[0], i = q.indexOf("?");
+  if (i < 0) return null;
+  const found = {};
+  for (const pair of q.slice(i + 1).split("&")) {
+    const j = pair.indexOf("=");
+    if (j < 0) continue;
+    const name = pair.slice(0, j), value = pair.slice(j + 1);
+    if (name.indexOf("%%") >= 0) return undefined;
+    if (value && (name === "lat" || name === "lng") && !(name in found)) {
+      found[name] = value;
+    }
+  }
+  if (!("lat" in found && "lng" in found)) return null;
+  const decimal = new RegExp(N2G_SPEC.decimal);
+  if (!decimal.test(found.lat) || !decimal.test(found.lng)) return undefined;
+  return [parseFloat(found.lat), parseFloat(found.lng)];
+}
+
+// The server's answer for inputs that need no upstream call, else null
+function n2gLocal(text) {
+  if (!new RegExp(N2G_SPEC.token).test(text)) return null;
+  const raw = text.trim();
+  const m = raw.match(new RegExp(N2G_SPEC.naver_url)) ||
+            raw.match(new RegExp(N2G_SPEC.nmap_url));
+  const url = m ? m[0] : raw;
+  if (url.indexOf(N2G_SPEC.short_link) >= 0 || /[\[\]]/.test(url)) return null;
+  if (url.indexOf("/place/") >= 0 && new RegExp(N2G_SPEC.place_id).test(url)) return null;
+  let coords = n2gParams(url);
+  if (coords === undefined) return null;
+  if (!coords && url.indexOf("@") >= 0) {
+    const at = url.match(new RegExp(N2G_SPEC.at));
+    if (at) coords = [parseFloat(at[1]), parseFloat(at[2])];
+  }
+  if (!coords || !isFinite(coords[0]) || !isFinite(coords[1])) return null;
+  const f = {lat: n2gPyFloat(coords[0]), lng: n2gPyFloat(coords[1])};
+  f.q = f.lat + "," + f.lng;
+  const fill = t => t.replace(/\{(\w+)\}/g, (_, k) => f[k]);
+  return {lat: coords[0], lng: coords[1], name: "",
+          google_url: fill(N2G_SPEC.google_url), apple_url: fill(N2G_SPEC.apple_url)};
+}
+"""
+
+SCRIPTABLE_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "scriptable", "Naver2Google.js")
+CLIENT_JS_BEGIN = "// <n2g:client> generated by `python naver2google.py --client-js`"
+CLIENT_JS_END = "// </n2g:client>"
+
+
+def client_js() -> str:
+    """The JavaScript counterpart of convert() for coordinate-only inputs."""
+    spec = json.dumps(CLIENT_SPEC, ensure_ascii=True, indent=2)
+    return _CLIENT_JS.strip("\n") % spec
+
+
+def write_client_js(path: str) -> bool:
+    """Replace the generated block between the markers in `path`.
+
+    Returns whether the file changed.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    start = text.index(CLIENT_JS_BEGIN)
+    end = text.index(CLIENT_JS_END, start) + len(CLIENT_JS_END)
+    block = f"{CLIENT_JS_BEGIN}\n{client_js()}\n{CLIENT_JS_END}"
+    if text[start:end] == block:
+        return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text[:start] + block + text[end:])
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Async engine (same pipeline, non-blocking I/O via httpx)
+# ---------------------------------------------------------------------------
+
+_async_client: httpx.AsyncClient | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the pooled httpx client bound to the running event loop."""
+    global _async_client, _async_client_loop
+    import httpx  # only the ASGI entry point needs it
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            headers=NAVER_HEADERS,
+            limits=httpx.Limits(
+                max_connections=POOL_SIZE * POOL_HOSTS,
+                max_keepalive_connections=POOL_SIZE,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def _close_async_client() -> None:
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = _async_client_loop = None
+    await _place_cache.aclose()
+    await _shortlink_cache.aclose()
+
+
+async def _fetch_short_link_async(url: str) -> str:
+    resp = await _shortlink_upstream.call_async(
+        _get_async_client().head, _short_link_request_url(url),
+        follow_redirects=True)
+    return _short_link_from_response(resp)
+
+
+async def _cached_short_link_async(code: str | None) -> str | None:
+    """_cached_short_link() without blocking the event loop on Redis or SQLite."""
+    if code is None:
+        return None
+    cached = await _shortlink_cache.get_async(code)
+    return await _stored_short_link_async(code) if cached is _MISSING else cached
+
+
+async def _stored_short_link_async(code: str | None) -> str | None:
+    if code is None:
+        return None
+    resolved = await _shortlink_store.get_async(code)
+    if resolved is not None:
+        await _shortlink_cache.set_async(code, resolved)
+    return resolved
+
+
+async def _load_short_link_async(code: str | None, url: str) -> str:
+    resolved = await _fetch_short_link_async(url)
+    if _pinnable(code, resolved):
+        await _shortlink_store.set_async(code, resolved)
+        await _shortlink_cache.set_async(code, resolved)
+    return resolved
+
+
+async def _resolve_short_link_async(url: str) -> str:
+    code = _short_code(url)
+    resolved = await _cached_short_link_async(code)
+    if resolved is None:
+        resolved = await _shortlink_flight_async.do(
+            code or url, _load_short_link_async, code, url)
+    return resolved
+
+
+async def _uncached_short_link_async(url: str) -> str:
+    code = _short_code(url)
+    resolved = await _stored_short_link_async(code)
+    if resolved is None:
+        resolved = await _shortlink_flight_async.do(
+            code or url, _load_short_link_async, code, url)
+    return resolved
+
+
+async def _fetch_place_once_async(
+        place_id: str) -> tuple[float, float, str] | None:
+    resp = await _place_upstream.call_async(
+        _get_async_client().get, PLACE_API.format(place_id))
+    return _place_from_response(resp)
+
+
+async def _fetch_place_async(place_id: str) -> tuple[float, float, str] | None:
+    return await _hedged_async(_place_hedge, _fetch_place_once_async, place_id)
+
+
+async def _load_place_async(place_id: str) -> tuple[float, float, str] | None:
+    result = await _fetch_place_async(place_id)
+    ttl = None if result else PLACE_NEGATIVE_TTL
+    await _place_cache.set_async(place_id, (result, time.time()), ttl)
+    return result
+
+
+async def _cached_place_async(place_id: str) -> object:
+    entry = await _place_cache.get_async(place_id)
+    return entry if entry is _MISSING else _serve_place(place_id, entry)
+
+
+async def _cached_places_async(place_ids: list[str]) -> dict[str, object]:
+    return {place_id: _serve_place(place_id, entry)
+            for place_id, entry in (await _place_cache.get_many_async(place_ids)).items()}
+
+
+async def _coords_from_place_api_async(
+        place_id: str) -> tuple[float, float, str] | None:
+    cached = await _cached_place_async(place_id)
+    return await _uncached_place_async(place_id) if cached is _MISSING else cached
+
+
+async def _uncached_place_async(place_id: str) -> tuple[float, float, str] | None:
+    try:
+        return await _place_flight_async.do(place_id, _load_place_async, place_id)
+    except Exception:
+        _mark_degraded()
+        return None
+
+
+async def convert_async(naver_url: str, with_name: bool = True) -> dict:
+    """Non-blocking convert(); shares its parsing, caches and result rules."""
+    started = time.perf_counter()
+    raw = naver_url.strip()
+    if not raw:
+        return {"error": "空的輸入"}
+
+    with span("extract"):
+        parsed = classify(raw)
+    if parsed.kind == "short_link":
+        try:
+            with span("short_link"):
+                resolved = await _resolve_short_link_async(parsed.url)
+            with span("parse"):
+                parsed = classify(resolved)
+        except Exception as e:
+            parsed = _share_text_fallback(raw, parsed.url, e)
+
+    place = None
+    if _needs_place_api(parsed, with_name):
+        with span("place_api"):
+            place = await _coords_from_place_api_async(parsed.place_id)
+    with span("build"):
+        return _resolve_timed(parsed, place, started)
+
+
+# ---------------------------------------------------------------------------
+# Batch conversion (deduplicated, concurrent upstream fan-out)
 # ---------------------------------------------------------------------------
 
-def _resolve_short_link(url: str) -> str:
-    """Follow naver.me redirect to get the full URL."""
-    resp = http_client.head(
-        url, allow_redirects=True, timeout=10, headers=NAVER_HEADERS,
-    )
-    return resp.url
+BATCH_MAX = int(os.environ.get("N2G_BATCH_MAX", "500"))
+BATCH_CONCURRENCY = int(os.environ.get("N2G_BATCH_CONCURRENCY", "16"))
+STREAM_MAX = int(os.environ.get("N2G_STREAM_MAX", "10000"))
 
 
-def _coords_from_params(url: str) -> tuple[float, float] | None:
-    """Extract lat/lng from URL query parameters."""
-    parsed = urlparse(url)
-    params = parse_qs(parsed.query)
-    if "lat" in params and "lng" in params:
+def _batch_inputs(body: str, limit: int = BATCH_MAX) -> list[str]:
+    """Split a batch body: a JSON array of strings, or pasted share text.
+
+    Share text yields every Naver/nmap URL it contains; text without any
+    URL is taken one non-empty line per item (e.g. a list of addresses).
+    """
+    text = body.strip()
+    items = None
+    if text.startswith("["):
         try:
-            return float(params["lat"][0]), float(params["lng"][0])
-        except (ValueError, IndexError):
-            pass
-    return None
+            items = json.loads(text)
+        except ValueError:
+            pass  # share text also starts with "[", e.g. "[NAVER 地图]"
+    if items is not None:
+        if not all(isinstance(item, str) for item in items):
+            raise ValueError("JSON 陣列只能包含字串")
+    else:
+        items = (_ANY_URL_RE.findall(text)
+                 or [line for line in text.splitlines() if line.strip()])
+    if not items:
+        raise ValueError("缺少輸入")
+    if len(items) > limit:
+        raise ValueError(f"一次最多 {limit} 筆")
+    return items
 
 
-def _extract_place_id(url: str) -> str | None:
-    """Extract numeric place ID from /place/12345 in the URL path."""
-    m = re.search(r"/place/(\d+)", url)
-    return m.group(1) if m else None
+class _Batch:
+    """One batch's bookkeeping: dedupes upstream keys, keeps input order."""
 
+    def __init__(self, inputs: list[str], with_name: bool):
+        self.with_name = with_name
+        self.raw = [raw.strip() for raw in inputs]
+        self.inputs = [classify(raw) if raw else None for raw in self.raw]
+        self.parsed: list[ParsedUrl | str] = []   # ParsedUrl or error text
 
-def _coords_from_place_api(place_id: str) -> tuple[float, float, str] | None:
-    """Call Naver Place Summary API to get coordinates and name."""
+    def short_links(self) -> dict[str, str]:
+        """Unique short code → a URL to resolve it with."""
+        links = {}
+        for p in self.inputs:
+            if p and p.kind == "short_link":
+                links.setdefault(p.short_code or p.url, p.url)
+        return links
+
+    def set_short_links(self, resolved: dict[str, str | Exception]) -> None:
+        for raw, p in zip(self.raw, self.inputs):
+            if p is None:
+                self.parsed.append("空的輸入")
+            elif p.kind == "short_link":
+                url = resolved[p.short_code or p.url]
+                if not isinstance(url, Exception):
+                    self.parsed.append(classify(url))
+                    continue
+                try:
+                    self.parsed.append(_share_text_fallback(raw, p.url, url))
+                except Exception as e:
+                    self.parsed.append(str(e))
+            else:
+                self.parsed.append(p)
+
+    def place_ids(self) -> dict[str, str]:
+        """Unique place IDs whose API answer can change a result."""
+        return {p.place_id: p.place_id for p in self.parsed
+                if isinstance(p, ParsedUrl) and _needs_place_api(p, self.with_name)}
+
+    def results(self, places: dict[str, object]) -> list[dict]:
+        out = []
+        for p in self.parsed:
+            if not isinstance(p, ParsedUrl):
+                out.append({"error": p})
+                continue
+            place = places.get(p.place_id) if _needs_place_api(p, self.with_name) else None
+            out.append(_resolve(p, None if isinstance(place, Exception) else place))
+        return out
+
+
+def _fan_out(fn, args: dict[str, str]) -> dict[str, object]:
+    """Run fn over args' values on a bounded thread pool; errors become values."""
+    if not args:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(args))) as pool:
+        futures = {key: pool.submit(fn, arg) for key, arg in args.items()}
+    return {key: f.exception() or f.result() for key, f in futures.items()}
+
+
+async def _fan_out_async(fn, args: dict[str, str]) -> dict[str, object]:
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(arg):
+        async with limit:
+            try:
+                return await fn(arg)
+            except Exception as e:
+                return e
+
+    values = await asyncio.gather(*(run(arg) for arg in args.values()))
+    return dict(zip(args, values))
+
+
+def _prefetch(get_many,
+              args: dict[str, str]) -> tuple[dict[str, object], dict[str, str]]:
+    """Split args into cached values (one multi-get) and keys still to fetch."""
+    known = get_many(list(args))
+    return known, {key: arg for key, arg in args.items() if key not in known}
+
+
+async def _prefetch_async(get_many,
+                          args: dict[str, str]) -> tuple[dict[str, object], dict[str, str]]:
+    known = await get_many(list(args))
+    return known, {key: arg for key, arg in args.items() if key not in known}
+
+
+def convert_batch(inputs: list[str], with_name: bool = True) -> list[dict]:
+    """convert() over many inputs, in order, each short code/place fetched once."""
+    batch = _Batch(inputs, with_name)
+    # one multi-get per cache; only the keys it missed go further
+    links, missing = _prefetch(_shortlink_cache.get_many, batch.short_links())
+    batch.set_short_links({**links, **_fan_out(_uncached_short_link, missing)})
+    places, missing = _prefetch(_cached_places, batch.place_ids())
+    return batch.results({**places, **_fan_out(_uncached_place, missing)})
+
+
+async def convert_batch_async(inputs: list[str],
+                              with_name: bool = True) -> list[dict]:
+    batch = _Batch(inputs, with_name)
+    links, missing = await _prefetch_async(_shortlink_cache.get_many_async,
+                                           batch.short_links())
+    links.update(await _fan_out_async(_uncached_short_link_async, missing))
+    batch.set_short_links(links)
+    places, missing = await _prefetch_async(_cached_places_async, batch.place_ids())
+    places.update(await _fan_out_async(_uncached_place_async, missing))
+    return batch.results(places)
+
+
+def _stream_groups(inputs: list[str]) -> list[tuple[str, list[int]]]:
+    """Inputs grouped by extracted URL: (first raw input, indexes sharing it).
+
+    The raw input, not the URL, is what gets converted, so share text keeps
+    its text-search fallback.
+    """
+    groups: dict[str, tuple[str, list[int]]] = {}
+    for i, raw in enumerate(inputs):
+        raw = raw.strip()
+        groups.setdefault(_extract_url(raw) if raw else "", (raw, []))[1].append(i)
+    return list(groups.values())
+
+
+def convert_stream(inputs: list[str], with_name: bool = True) -> Iterator[dict]:
+    """Yield {"index": i, ...result} for each input as soon as it resolves.
+
+    Results arrive in completion order, so the first line only waits for
+    the fastest input. Duplicate inputs are converted once.
+    """
+    groups = _stream_groups(inputs)
+    pool = ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(groups) or 1))
     try:
-        resp = http_client.get(
-            PLACE_API.format(place_id),
-            headers=NAVER_HEADERS,
-            timeout=10,
-        )
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        detail = data.get("data", {}).get("placeDetail", {})
-        coord = detail.get("coordinate", {})
-        lat = coord.get("latitude")
-        lng = coord.get("longitude")
-        if lat is None or lng is None:
-            return None
-        name = detail.get("name", "")
-        return float(lat), float(lng), name
-    except Exception:
-        return None
+        futures = {pool.submit(convert, raw, with_name): indexes for raw, indexes in groups}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": str(e)}
+            for i in futures.pop(future):
+                yield {"index": i, **result}
+    finally:
+        # client went away mid-stream: drop the queued conversions
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
-def _coords_from_at_pattern(url: str) -> tuple[float, float] | None:
-    """Extract coordinates from @lat,lng pattern in URL."""
-    m = re.search(r"@(-?\d+\.\d+),(-?\d+\.\d+)", url)
-    if m:
-        return float(m.group(1)), float(m.group(2))
-    return None
+async def convert_stream_async(inputs: list[str],
+                               with_name: bool = True) -> AsyncIterator[dict]:
+    groups = _stream_groups(inputs)
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
 
+    async def run(raw, indexes):
+        async with limit:
+            try:
+                return indexes, await convert_async(raw, with_name)
+            except Exception as e:
+                return indexes, {"error": str(e)}
 
-def _extract_url(text: str) -> str:
-    """Extract a Naver Map URL from pasted text that may contain extra lines.
+    tasks = [asyncio.ensure_future(run(raw, indexes)) for raw, indexes in groups]
+    try:
+        for done in asyncio.as_completed(tasks):
+            indexes, result = await done
+            for i in indexes:
+                yield {"index": i, **result}
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    Handles share text like:
-        [NAVER 地图]
-        Store Name
-        Address line
-        https://naver.me/XXXXX
+
+def _ndjson(obj: dict) -> str:
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Cache snapshots (restore on boot, periodic dump, warm-up)
+# ---------------------------------------------------------------------------
+
+SNAPSHOT_PATH = os.environ.get("N2G_SNAPSHOT", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("N2G_SNAPSHOT_INTERVAL", "300"))
+SNAPSHOT_MAX = int(os.environ.get("N2G_SNAPSHOT_MAX", "5000"))
+
+_snapshot_lock = threading.Lock()
+_snapshot_started = False
+
+
+def _read_snapshot(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _snapshot_places(data: dict) -> dict[str, list]:
+    """The well-formed place entries of a snapshot; anything else is dropped."""
+    places = data.get("places")
+    if not isinstance(places, dict):
+        return {}
+    return {place_id: entry for place_id, entry in places.items()
+            if isinstance(entry, list) and len(entry) == 4
+            and all(isinstance(v, (int, float)) for v in (entry[0], entry[1], entry[3]))}
+
+
+def _snapshot_shortlinks(data: dict) -> dict[str, str]:
+    shortlinks = data.get("shortlinks")
+    if not isinstance(shortlinks, dict):
+        return {}
+    return {code: url for code, url in shortlinks.items() if isinstance(url, str)}
+
+
+def load_snapshot(path: str) -> int:
+    """Seed the place and short-link caches from a snapshot file.
+
+    Snapshot format: {"places": {id: [lat, lng, name, fetched_at]},
+    "shortlinks": {code: url}}. Places older than the hard TTL are skipped;
+    the rest keep their age, so stale ones refresh on first use.
     """
-    m = re.search(r"(https?://(?:naver\.me|map\.naver\.com|m\.map\.naver\.com)\S+)", text)
-    if m:
-        return m.group(1)
-    # Also match nmap:// scheme
-    m = re.search(r"(nmap://\S+)", text)
-    if m:
-        return m.group(1)
-    return text
+    data = _read_snapshot(path)
+    now = time.time()
+    loaded = 0
+    for place_id, (lat, lng, name, fetched_at) in _snapshot_places(data).items():
+        remaining = PLACE_TTL - (now - fetched_at)
+        if remaining > 0:
+            _place_cache.set(place_id, ((lat, lng, name), fetched_at), remaining)
+            loaded += 1
+    for code, url in _snapshot_shortlinks(data).items():
+        _shortlink_cache.set(code, url)
+        loaded += 1
+    return loaded
 
 
-def _build_result(lat: float, lng: float, name: str) -> dict:
-    """Build result dict with both Google and Apple Maps URLs."""
-    label = quote(name) if name else ""
-    return {
-        "lat": lat, "lng": lng, "name": name,
-        "google_url": f"https://www.google.com/maps?q={lat},{lng}",
-        "apple_url": f"https://maps.apple.com/?ll={lat},{lng}&q={label}" if name
-                     else f"https://maps.apple.com/?ll={lat},{lng}&q={lat},{lng}",
-    }
+def dump_snapshot(path: str, limit: int = SNAPSHOT_MAX) -> int:
+    """Merge this worker's hot set into the snapshot file.
 
+    Workers share one file: existing entries are kept, newer fetches win,
+    and only the `limit` most recent places and short links survive. The
+    file is replaced atomically; malformed entries already in it are dropped.
+    """
+    with _snapshot_lock:
+        data = _read_snapshot(path)
+        places = _snapshot_places(data)
+        for place_id, (result, fetched_at) in _place_cache.items(limit):
+            if result and fetched_at >= (places.get(place_id) or (0,) * 4)[3]:
+                places[place_id] = [*result, fetched_at]
+        places = dict(sorted(places.items(), key=lambda kv: kv[1][3])[-limit:])
+        shortlinks = _snapshot_shortlinks(data)
+        for code, url in reversed(_shortlink_cache.items(limit)):
+            shortlinks.pop(code, None)
+            shortlinks[code] = url   # hottest last, so the cap drops cold ones
+        shortlinks = dict(list(shortlinks.items())[-limit:])
 
-def convert(naver_url: str) -> dict:
-    """Main conversion: Naver URL → {lat, lng, name, google_url, apple_url}."""
-    raw = naver_url.strip()
-    if not raw:
-        return {"error": "空的輸入"}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "places": places,
+                       "shortlinks": shortlinks}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    return len(places) + len(shortlinks)
 
-    # Step 0a: extract URL from multi-line share text
-    url = _extract_url(raw)
 
-    # Step 0b: resolve short links
-    if "naver.me/" in url:
-        url = _resolve_short_link(url)
-
-    # Step 1: try lat/lng from URL params
-    coords = _coords_from_params(url)
-    if coords:
-        lat, lng = coords
-        name = ""
-        place_id = _extract_place_id(url)
+def _save_snapshot() -> None:
+    try:
+        dump_snapshot(SNAPSHOT_PATH)
+    except Exception as e:  # keep the snapshot thread (and the exit hook) alive
+        sys.stderr.write(f"naver2google: snapshot dump to {SNAPSHOT_PATH} failed: {e!r}\n")
+
+
+def _snapshot_loop() -> None:
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        _save_snapshot()
+
+
+def _start_snapshots() -> None:
+    """Start this worker's periodic snapshot dump (once per process)."""
+    global _snapshot_started
+    if not SNAPSHOT_PATH or _snapshot_started:
+        return
+    with _snapshot_lock:
+        if _snapshot_started:
+            return
+        _snapshot_started = True
+    atexit.register(_save_snapshot)
+    if SNAPSHOT_INTERVAL > 0:
+        threading.Thread(target=_snapshot_loop, name="n2g-snapshot",
+                         daemon=True).start()
+
+
+def warm(lines: list[str]) -> int:
+    """Fetch place IDs (or place URLs) into the cache; returns hits found."""
+    place_ids = {}
+    for line in lines:
+        line = line.strip()
+        place_id = line if line.isdigit() else classify(line).place_id
         if place_id:
-            result = _coords_from_place_api(place_id)
-            if result:
-                name = result[2]
-        return _build_result(lat, lng, name)
-
-    # Step 2: try Place ID → API
-    place_id = _extract_place_id(url)
-    if place_id:
-        result = _coords_from_place_api(place_id)
-        if result:
-            lat, lng, name = result
-            return _build_result(lat, lng, name)
+            place_ids[place_id] = place_id
+    results = _fan_out(_coords_from_place_api, place_ids)
+    return sum(1 for r in results.values() if r and not isinstance(r, Exception))
 
-    # Step 3: try @lat,lng pattern
-    coords = _coords_from_at_pattern(url)
-    if coords:
-        lat, lng = coords
-        return _build_result(lat, lng, "")
 
-    # Step 3.5: address entry URL (/entry/address/CODE,CODE,address)
-    addr_match = re.search(r"/entry/address/[^,]+,[^,]+,(.+?)(?:\?|$)", url)
-    if addr_match:
-        query = unquote(addr_match.group(1)).strip()
-        return {
-            "lat": None, "lng": None, "name": query,
-            "google_url": f"https://www.google.com/maps/search/{quote(query)}",
-            "apple_url": f"https://maps.apple.com/?q={quote(query)}",
-        }
+if SNAPSHOT_PATH:
+    load_snapshot(SNAPSHOT_PATH)
 
-    # Step 4: fallback — pass as search query
-    query = unquote(url)
+
+def runtime_stats() -> dict:
+    """Connection pool and cache counters for this worker process."""
     return {
-        "lat": None, "lng": None, "name": query,
-        "google_url": f"https://www.google.com/maps/search/{quote(query)}",
-        "apple_url": f"https://maps.apple.com/?q={quote(query)}",
+        "pid": os.getpid(),
+        "pool": pool_stats(),
+        "place_cache": _place_cache.stats(),
+        "shortlink_cache": _shortlink_cache.stats(),
+        "shortlink_store": _shortlink_store.stats(),
+        "upstream": {
+            "place": _place_upstream.stats(),
+            "shortlink": _shortlink_upstream.stats(),
+        },
+        "place_hedge": _place_hedge.stats(),
+        "place_refresh": {**_refresh_stats, "pending": len(_refreshing)},
+        "singleflight": {
+            "place": _place_flight.stats(),
+            "shortlink": _shortlink_flight.stats(),
+            "place_async": _place_flight_async.stats(),
+            "shortlink_async": _shortlink_flight_async.stats(),
+        },
     }
 
 
+class _Collected(NamedTuple):
+    """Already-collected metric families, in the shape generate_latest() reads."""
+
+    families: list
+
+    def collect(self) -> list:
+        return self.families
+
+
+def _cache_hit_ratio(families: list) -> GaugeMetricFamily:
+    """n2g_cache_hit_ratio from the hit and miss counters being exported."""
+    counts: dict[str, list[float]] = {}
+    for family in families:
+        if family.name not in ("n2g_cache_hits", "n2g_cache_misses"):
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_total"):
+                row = counts.setdefault(sample.labels["cache"], [0.0, 0.0])
+                row[family.name == "n2g_cache_misses"] += sample.value
+    ratio = GaugeMetricFamily("n2g_cache_hit_ratio",
+                              "Hits / lookups since the workers started.", labels=("cache",))
+    for cache, (hits, misses) in sorted(counts.items()):
+        ratio.add_metric((cache,), round(hits / (hits + misses), 4) if hits + misses else 0.0)
+    return ratio
+
+
+def render_metrics() -> bytes:
+    """Prometheus exposition of every worker's metrics (this process's if not multiprocess)."""
+    registry = REGISTRY
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    families = list(registry.collect())
+    return generate_latest(_Collected(families + [_cache_hit_ratio(families)]))
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler (admin only)
+# ---------------------------------------------------------------------------
+
+ADMIN_TOKEN = os.environ.get("N2G_ADMIN_TOKEN", "")   # empty = admin routes off
+PROFILE_INTERVAL = float(os.environ.get("N2G_PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = 25.0   # well under the gunicorn worker timeout (65 s by default)
+
+_profile_lock = threading.Lock()
+
+
+def _admin_allowed(headers) -> bool | None:
+    """None when admin routes are disabled, else whether the Bearer token matches.
+
+    Only the Authorization header is accepted: a ?token= query string would
+    end up in access logs and proxy logs.
+    """
+    if not ADMIN_TOKEN:
+        return None
+    auth = headers.get("Authorization") or headers.get("authorization") or ""
+    token = auth[7:] if auth.startswith("Bearer ") else ""
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _stack_key(frame, thread_name: str) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL) -> str:
+    """Sample every other thread's stack for `seconds`.
+
+    Returns collapsed stacks ("thread;outer;...;inner count" per line), the
+    input format of flamegraph.pl and speedscope. Only one profile runs per
+    worker at a time; a second caller gets RuntimeError.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("profile already running")
+    try:
+        me = threading.get_ident()
+        counts: dict[str, int] = {}
+        deadline = time.monotonic() + min(seconds, PROFILE_MAX_SECONDS)
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    key = _stack_key(frame, names.get(ident, f"thread-{ident}"))
+                    counts[key] = counts.get(key, 0) + 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    ordered = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
+    return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+
+def _profile_seconds(args) -> float:
+    try:
+        return max(0.1, float(args.get("seconds", "10")))
+    except ValueError:
+        raise ValueError("seconds 必須是數字") from None
+
+
+# ---------------------------------------------------------------------------
+# HTTP caching and precompressed static pages
+# ---------------------------------------------------------------------------
+
+CACHE_MAX_AGE = int(os.environ.get("N2G_CACHE_MAX_AGE", "3600"))
+INDEX_MAX_AGE = int(os.environ.get("N2G_INDEX_MAX_AGE", "86400"))
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 prescribes for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag
+               for tag in if_none_match.split(","))
+
+
+def _revalidate(payload: bytes, if_none_match: str | None) -> tuple[dict, bool]:
+    """Caching headers for a successful answer and whether it is a 304.
+
+    The strong ETag is a hash of the answer itself. Answers built from a
+    fallback because Naver was unavailable are sent no-store, so browsers
+    and CDNs don't pin them for max-age.
+    """
+    trace = _current_trace.get()
+    if trace is not None and trace.degraded:
+        return {"Cache-Control": "no-store"}, False
+    etag = '"' + hashlib.blake2b(payload, digest_size=12).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    return headers, _etag_matches(if_none_match, etag)
+
+
+def _brotli():
+    """The brotli (or brotlicffi) module when installed, else None."""
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            return None
+    return brotli
+
+
+def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().lower().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if q and float(q) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding == "*":
+            accepted.update(("br", "gzip"))
+        elif coding:
+            accepted.add(coding)
+    return accepted
+
+
+class StaticPage:
+    """A fixed body kept identity-, gzip- and (if available) brotli-encoded.
+
+    Every variant is compressed once up front; respond() only negotiates
+    and checks If-None-Match. Each encoding has its own strong ETag.
+    """
+
+    def __init__(self, body: bytes, content_type: str, max_age: int):
+        self.content_type = content_type
+        self.cache_control = f"public, max-age={max_age}"
+        tag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.variants = {
+            "identity": (body, f'"{tag}"'),
+            "gzip": (gzip.compress(body, 9, mtime=0), f'"{tag}-gz"'),
+        }
+        brotli = _brotli()
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{tag}-br"')
+
+    def respond(self, accept_encoding: str | None,
+                if_none_match: str | None) -> tuple[int, bytes, dict]:
+        """(status, body, headers) for a request with these headers."""
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next((e for e in ("br", "gzip")
+                         if e in accepted and e in self.variants), "identity")
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control,
+                   "Vary": "Accept-Encoding"}
+        if _etag_matches(if_none_match, etag):
+            return 304, b"", headers
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, body, headers
+
+
 # ---------------------------------------------------------------------------
 # Flask app
 # ---------------------------------------------------------------------------
 
 app = Flask(__name__)
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+@app.before_request
+def _start_worker_threads():
+    _start_snapshots()
+    start_warm_up()
+    g.started = time.perf_counter()
+    _current_trace.set(Trace())
+
+
+@app.after_request
+def _record_request(response):
+    route = request.url_rule.rule if request.url_rule else "other"
+    HTTP_REQUESTS.labels(route, str(response.status_code)).inc()
+    HTTP_SECONDS.labels(route).observe(time.perf_counter() - g.started)
+    _finish_trace(_current_trace.get(), route, response.status_code,
+                  response.headers)
+    return response
+
+
+@app.teardown_request
+def _clear_trace(exc):
+    _current_trace.set(None)   # pooled threads must not keep a stale trace
+
 
 INDEX_HTML = """\
 <!DOCTYPE html>
@@ -255,6 +2463,7 @@ button{width:100%;padding:10px;border:none;border-radius:8px;cursor:pointer;
   </div>
 </div>
 <script>
+// n2g:client
 async function doConvert(){
   const input=document.getElementById('url-input').value.trim();
   if(!input)return;
@@ -263,8 +2472,9 @@ async function doConvert(){
   const ld=document.getElementById('loading');
   ra.style.display='none';ea.style.display='none';ld.style.display='block';
   try{
-    const r=await fetch('/convert?url='+encodeURIComponent(input));
-    const d=await r.json();
+    // links that carry coordinates convert here without a request
+    const d=n2gLocal(input)||
+      await (await fetch('/convert?url='+encodeURIComponent(input))).json();
     ld.style.display='none';
     if(d.error){ea.textContent=d.error;ea.style.display='block';return}
     document.getElementById('r-name').textContent=d.name||'(無名稱)';
@@ -285,43 +2495,352 @@ document.getElementById('url-input').addEventListener('keydown',function(e){
 </body>
 </html>
 """
+_index_page: StaticPage | None = None
+
+
+def _get_index_page() -> StaticPage:
+    """The web UI with the client JS embedded, compressed on first request."""
+    global _index_page
+    if _index_page is None:
+        html = INDEX_HTML.replace("// n2g:client\n", client_js() + "\n")
+        _index_page = StaticPage(html.encode(), "text/html; charset=utf-8", INDEX_MAX_AGE)
+    return _index_page
+
+
+_warm_up_started = False
+
+
+def start_warm_up() -> None:
+    """Build the deferred imports and pages on a background thread (once per process).
+
+    Called as a worker boots, so it answers /health right away and the
+    first /convert usually finds requests already imported.
+    """
+    global _warm_up_started
+    if _warm_up_started:
+        return
+    _warm_up_started = True
+    threading.Thread(target=_warm_up, name="n2g-warm-up", daemon=True).start()
+
+
+def _warm_up() -> None:
+    _get_session()
+    _get_index_page()
+
+
+def _after_fork() -> None:
+    """Reset per-process state in a forked child (a gunicorn worker).
+
+    The child inherits the parent's sessions, connections and pool objects
+    but none of its threads, and a lock held by a parent thread would stay
+    held forever; start over so each is rebuilt lazily on first use.
+    """
+    global _session, _session_lock, _hedge_pool, _hedge_lock
+    global _refresh_pool, _refresh_lock, _snapshot_lock, _snapshot_started, _warm_up_started
+    _session, _session_lock = None, threading.Lock()
+    _hedge_pool, _hedge_lock = None, threading.Lock()
+    _refresh_pool, _refresh_lock = None, threading.Lock()
+    _refreshing.clear()
+    _snapshot_lock, _snapshot_started = threading.Lock(), False
+    _warm_up_started = False
+    _place_cache.after_fork()
+    _shortlink_cache.after_fork()
+    _shortlink_store.after_fork()
+
+
+if hasattr(os, "register_at_fork"):   # no fork() on Windows
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+# ---------------------------------------------------------------------------
+# Routes — one body per endpoint, served by both the Flask and the ASGI app
+# ---------------------------------------------------------------------------
+
+class Request(NamedTuple):
+    """What a route reads from an HTTP request, whichever server took it."""
+    args: Mapping[str, str]
+    headers: Mapping[str, str]   # look names up in lowercase (ASGI's dict is lowercase)
+    body: bytes = b""
+
+
+class Reply(NamedTuple):
+    """What a route returns; the Flask and ASGI adapters send it as is."""
+    status: int
+    body: bytes | Iterator[bytes] | AsyncIterator[bytes]   # an iterator is streamed
+    headers: dict
+
+
+def _json_reply(obj: object, status: int = 200) -> Reply:
+    body = json.dumps(obj, separators=(",", ":"), sort_keys=True).encode()
+    return Reply(status, body + b"\n", {"Content-Type": "application/json"})
+
+
+def _text_reply(text: str, status: int = 200) -> Reply:
+    return Reply(status, text.encode(), {"Content-Type": "text/plain; charset=utf-8"})
 
 
-@app.route("/health")
-def health():
-    return "ok"
+class _BlockingIO:
+    """The routes' upstream calls for Flask: plain calls that never suspend.
+
+    Routes are coroutines so that ASGI can await _AsyncIO, while Flask runs
+    them with _run_inline(). That only works if nothing a route awaits
+    ever suspends. So these methods must not await anything, and a route
+    may only await `io` methods. tests/test_routes.py checks both rules.
+    """
+
+    async def convert(self, url: str, with_name: bool) -> dict:
+        return convert(url, with_name=with_name)
+
+    async def convert_batch(self, inputs: list[str], with_name: bool) -> list[dict]:
+        return convert_batch(inputs, with_name=with_name)
+
+    def convert_stream(self, inputs: list[str], with_name: bool) -> Iterator[bytes]:
+        return (_ndjson(line).encode() for line in convert_stream(inputs, with_name=with_name))
+
+    async def sample_stacks(self, seconds: float) -> str:
+        return sample_stacks(seconds)
+
+
+_BLOCKING_IO = _BlockingIO()
+
+
+class _AsyncIO:
+    """The routes' upstream calls for ASGI, awaited on the event loop."""
+
+    async def convert(self, url: str, with_name: bool) -> dict:
+        return await convert_async(url, with_name=with_name)
+
+    async def convert_batch(self, inputs: list[str], with_name: bool) -> list[dict]:
+        return await convert_batch_async(inputs, with_name=with_name)
+
+    async def convert_stream(self, inputs: list[str], with_name: bool) -> AsyncIterator[bytes]:
+        async for line in convert_stream_async(inputs, with_name=with_name):
+            yield _ndjson(line).encode()
+
+    async def sample_stacks(self, seconds: float) -> str:
+        # off the event loop, so the loop's own stack shows up in the samples
+        return await asyncio.to_thread(sample_stacks, seconds)
+
+
+_ASYNC_IO = _AsyncIO()
 
 
-@app.route("/")
-def index():
-    return Response(INDEX_HTML, content_type="text/html; charset=utf-8")
+async def route_health(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    return _text_reply("ok")
 
 
-@app.route("/convert")
-def api_convert():
-    url = request.args.get("url", "").strip()
+async def route_stats(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    return _json_reply(runtime_stats())
+
+
+async def route_metrics(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    return Reply(200, render_metrics(), {"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def route_admin_profile(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    allowed = _admin_allowed(req.headers)
+    if allowed is None:
+        return _text_reply("Not Found", 404)
+    if not allowed:
+        return _text_reply("Forbidden", 403)
+    try:
+        stacks = await io.sample_stacks(_profile_seconds(req.args))
+    except ValueError as e:
+        return _text_reply(str(e), 400)
+    except RuntimeError as e:
+        return _text_reply(str(e), 409)
+    return _text_reply(stacks)
+
+
+async def route_index(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    page = _get_index_page()
+    status, body, headers = page.respond(
+        req.headers.get("accept-encoding"), req.headers.get("if-none-match"))
+    return Reply(status, body, {"Content-Type": page.content_type, **headers})
+
+
+async def route_convert(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    url = req.args.get("url", "").strip()
     if not url:
-        return jsonify({"error": "缺少 url 參數"}), 400
+        return _json_reply({"error": "缺少 url 參數"}, 400)
+    with_name = req.args.get("name", "1") != "0"
     try:
-        result = convert(url)
-        return jsonify(result)
+        reply = _json_reply(await io.convert(url, with_name))
     except Exception as e:
-        return jsonify({"error": str(e)}), 502
+        return _json_reply({"error": str(e)}, 502)
+    headers, not_modified = _revalidate(reply.body, req.headers.get("if-none-match"))
+    if not_modified:
+        return Reply(304, b"", headers)
+    return reply._replace(headers={**reply.headers, **headers})
+
+
+async def route_convert_batch(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    stream = req.args.get("stream") == "1"
+    try:
+        inputs = _batch_inputs(req.body.decode("utf-8", "replace"),
+                               STREAM_MAX if stream else BATCH_MAX)
+    except ValueError as e:
+        return _json_reply({"error": str(e)}, 400)
+    with_name = req.args.get("name", "1") != "0"
+    if stream:
+        return Reply(200, io.convert_stream(inputs, with_name),
+                     {"Content-Type": "application/x-ndjson"})
+    return _json_reply({"results": await io.convert_batch(inputs, with_name)})
 
 
-@app.route("/go")
-def api_go():
-    url = request.args.get("url", "").strip()
+async def route_go(io: _BlockingIO | _AsyncIO, req: Request) -> Reply:
+    url = req.args.get("url", "").strip()
     if not url:
-        return "缺少 url 參數", 400
-    target = request.args.get("target", "google").strip().lower()
+        return _text_reply("缺少 url 參數", 400)
+    target = req.args.get("target", "google").strip().lower()
+    # Google links carry only coordinates, so the name lookup can be skipped
+    with_name = target == "apple" and req.args.get("name", "1") != "0"
     try:
-        result = convert(url)
-        if target == "apple":
-            return redirect(result["apple_url"])
-        return redirect(result["google_url"])
+        result = await io.convert(url, with_name)
     except Exception as e:
-        return f"Error: {e}", 502
+        return _text_reply(f"Error: {e}", 502)
+    location = result["apple_url"] if target == "apple" else result["google_url"]
+    headers, not_modified = _revalidate(location.encode(), req.headers.get("if-none-match"))
+    if not_modified:
+        return Reply(304, b"", headers)
+    return Reply(302, b"", {"Content-Type": "text/plain; charset=utf-8",
+                            "Location": location, **headers})
+
+
+GET = ("GET", "HEAD")
+
+# path → (allowed methods, route)
+ROUTES = {
+    "/health": (GET, route_health),
+    "/stats": (GET, route_stats),
+    "/metrics": (GET, route_metrics),
+    "/admin/profile": (GET, route_admin_profile),
+    "/": (GET, route_index),
+    "/convert": (GET, route_convert),
+    "/convert/batch": (("POST",), route_convert_batch),
+    "/go": (GET, route_go),
+}
+
+
+def _run_inline(coro):
+    """Result of a route coroutine that never suspends (one given _BlockingIO).
+
+    See _BlockingIO for why a route given it never suspends.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("route awaited real I/O outside an event loop")
+
+
+def _not_found() -> Reply:
+    return _text_reply("Not Found", 404)
+
+
+def _method_not_allowed(methods) -> Reply:
+    reply = _text_reply("Method Not Allowed", 405)
+    return reply._replace(headers={**reply.headers, "Allow": ", ".join(methods)})
+
+
+def _flask_response(reply: Reply) -> Response:
+    status, body, headers = reply
+    return Response(body, status=status, headers=headers)
+
+
+def _flask_view(route):
+    def view():
+        req = Request(request.args, request.headers, request.get_data())
+        return _flask_response(_run_inline(route(_BLOCKING_IO, req)))
+
+    view.__name__ = route.__name__
+    return view
+
+
+@app.errorhandler(404)
+def _flask_not_found(e):
+    return _flask_response(_not_found())
+
+
+@app.errorhandler(405)
+def _flask_method_not_allowed(e):
+    return _flask_response(_method_not_allowed(e.valid_methods or ()))
+
+
+for _path, (_methods, _route) in ROUTES.items():
+    app.add_url_rule(_path, view_func=_flask_view(_route), methods=list(_methods))
+
+
+# ---------------------------------------------------------------------------
+# ASGI app — serve with `uvicorn naver2google:asgi_app`
+# ---------------------------------------------------------------------------
+
+async def _asgi_request(scope: dict, receive) -> Request:
+    """The query, headers and body of an ASGI HTTP request."""
+    query = parse_qs(scope["query_string"].decode("utf-8", "replace"),
+                     keep_blank_values=True)
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1")
+               for k, v in scope["headers"]}
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return Request({k: v[0] for k, v in query.items()}, headers, b"".join(chunks))
+
+
+async def _asgi_lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            _start_snapshots()
+            start_warm_up()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await _close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def asgi_app(scope: dict, receive, send) -> None:
+    """Serve ROUTES over ASGI; upstream calls go through convert_async()."""
+    if scope["type"] == "lifespan":
+        await _asgi_lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    started = time.perf_counter()
+    trace = Trace()
+    _current_trace.set(trace)   # each ASGI request runs in its own task context
+    method = scope["method"]
+    methods, route = ROUTES.get(scope["path"], (None, None))
+    if route is None:
+        resp = _not_found()
+    elif method not in methods:
+        resp = _method_not_allowed(methods)
+    else:
+        resp = await route(_ASYNC_IO, await _asgi_request(scope, receive))
+    label = scope["path"] if route is not None else "other"
+    HTTP_REQUESTS.labels(label, str(resp.status)).inc()
+    HTTP_SECONDS.labels(label).observe(time.perf_counter() - started)
+    extra = dict(resp.headers)
+    _finish_trace(trace, label, resp.status, extra)
+    headers = [(k.lower().encode(), v.encode("latin-1")) for k, v in extra.items()]
+    if not isinstance(resp.body, bytes):
+        await send({"type": "http.response.start", "status": resp.status,
+                    "headers": headers})
+        async for chunk in resp.body:
+            await send({"type": "http.response.body", "body": chunk,
+                        "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    headers.append((b"content-length", str(len(resp.body)).encode()))
+    await send({"type": "http.response.start", "status": resp.status,
+                "headers": headers})
+    body = b"" if method == "HEAD" else resp.body
+    await send({"type": "http.response.body", "body": body})
 
 
 # ---------------------------------------------------------------------------
@@ -329,9 +2848,35 @@ def api_go():
 # ---------------------------------------------------------------------------
 
 def main():
+    global SNAPSHOT_PATH
+    import argparse  # CLI only; servers import the module without it
+
     parser = argparse.ArgumentParser(description="Naver Map → Google Maps 轉換器")
     parser.add_argument("--port", type=int, default=8585)
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH,
+                        help="快取快照檔：啟動時載入、定期寫回（預設 N2G_SNAPSHOT）")
+    parser.add_argument("--warm", metavar="FILE",
+                        help="查詢 FILE 中的 Place ID（每行一個，- 為 stdin），寫入快照後結束")
+    parser.add_argument("--client-js", nargs="?", metavar="FILE", const=SCRIPTABLE_JS,
+                        help="重新產生 FILE（預設 Scriptable 腳本）中的前端轉換程式碼後結束")
     args = parser.parse_args()
+
+    if args.client_js:
+        changed = write_client_js(args.client_js)
+        print(f"{'updated' if changed else 'up to date'}: {args.client_js}")
+        return
+
+    if args.snapshot != SNAPSHOT_PATH:
+        SNAPSHOT_PATH = args.snapshot
+        load_snapshot(SNAPSHOT_PATH)
+    if args.warm:
+        if not SNAPSHOT_PATH:
+            parser.error("--warm 需要 --snapshot 或 N2G_SNAPSHOT")
+        with (sys.stdin if args.warm == "-" else open(args.warm, encoding="utf-8")) as f:
+            found = warm(f.readlines())
+        saved = dump_snapshot(SNAPSHOT_PATH)
+        print(f"warmed {found} places, {saved} entries in {SNAPSHOT_PATH}")
+        return
     app.run(host="0.0.0.0", port=args.port, debug=False)
 
 
@@ -6,6 +6,9 @@
 // 2. 在 Naver Map app 按分享 → 選 Scriptable → 選這個腳本
 
 const API = "https://naver2google.onrender.com";
+const CACHE_DAYS = 30;   // 快取結果的有效天數，過期後仍可在離線時使用
+const CACHE_MAX = 500;   // 最多保留的筆數
+const REFRESH_AFTER = 3600;   // 秒；伺服器未提供 max-age 時，快取超過此時間才在背景更新
 
 // 從 Share Sheet 取得輸入
 let input = args.plainTexts?.[0] || args.urls?.[0] || "";
@@ -15,6 +18,8 @@ if (!input && args.shortcutParameter) {
 }
 
 if (!input) {
+  // 使用者輸入時順便喚醒伺服器（Render 免費方案閒置後需冷啟動），不等待結果
+  new Request(`${API}/health`).load().catch(() => {});
   // 如果沒有 Share Sheet 輸入，顯示輸入框
   let alert = new Alert();
   alert.title = "Naver → Maps";
@@ -45,15 +50,146 @@ function extractUrl(text) {
   return text.trim();
 }
 
-let cleanInput = extractUrl(input);
+// 含座標的連結直接在本機轉換（規則由 naver2google.py 產生，請勿手動修改）
+// <n2g:client> generated by `python naver2google.py --client-js`
+const N2G_SPEC = {
+  "token": "^[\\t\\n\\r ]*[\\x21-\\x7e]+[\\t\\n\\r ]*$",
+  "naver_url": "https?://(?:naver\\.me|map\\.naver\\.com|m\\.map\\.naver\\.com)\\S+",
+  "nmap_url": "nmap://\\S+",
+  "short_link": "naver.me/",
+  "place_id": "/place/(\\d+)",
+  "at": "@(-?\\d+\\.\\d+),(-?\\d+\\.\\d+)",
+  "decimal": "^-?\\d+(?:\\.\\d+)?$",
+  "google_url": "https://www.google.com/maps?q={lat},{lng}",
+  "apple_url": "https://maps.apple.com/?ll={lat},{lng}&q={q}"
+};
 
-// 呼叫 API
-let url = `${API}/convert?url=${encodeURIComponent(cleanInput)}`;
-let req = new Request(url);
-req.timeoutInterval = 15;
+// repr() of a Python float, so coordinates print exactly as the server's
+function n2gPyFloat(x) {
+  if (Object.is(x, -0)) return "-0.0";
+  const m = x.toExponential().match(/^(-?)(\d)(?:\.(\d+))?e([+-]\d+)$/);
+  const sign = m[1], digits = m[2] + (m[3] || ""), exp = parseInt(m[4], 10);
+  if (exp < -4 || exp >= 16) {
+    const e = Math.abs(exp);
+    return sign + digits[0] + (digits.length > 1 ? "." + digits.slice(1) : "") +
+      "e" + (exp < 0 ? "-" : "+") + (e < 10 ? "0" + e : e);
+  }
+  if (exp < 0) return sign + "0." + "0".repeat(-exp - 1) + digits;
+  if (digits.length > exp + 1) {
+    return sign + digits.slice(0, exp + 1) + "." + digits.slice(exp + 1);
+  }
+  return sign + digits + "0".repeat(exp + 1 - digits.length) + ".0";
+}
 
-try {
+// lat/lng query params: [lat, lng], null (none) or undefined (ask the server)
+function n2gParams(url) {
+  const q = url.split("#")[0], i = q.indexOf("?");
+  if (i < 0) return null;
+  const found = {};
+  for (const pair of q.slice(i + 1).split("&")) {
+    const j = pair.indexOf("=");
+    if (j < 0) continue;
+    const name = pair.slice(0, j), value = pair.slice(j + 1);
+    if (name.indexOf("%") >= 0) return undefined;
+    if (value && (name === "lat" || name === "lng") && !(name in found)) {
+      found[name] = value;
+    }
+  }
+  if (!("lat" in found && "lng" in found)) return null;
+  const decimal = new RegExp(N2G_SPEC.decimal);
+  if (!decimal.test(found.lat) || !decimal.test(found.lng)) return undefined;
+  return [parseFloat(found.lat), parseFloat(found.lng)];
+}
+
+// The server's answer for inputs that need no upstream call, else null
+function n2gLocal(text) {
+  if (!new RegExp(N2G_SPEC.token).test(text)) return null;
+  const raw = text.trim();
+  const m = raw.match(new RegExp(N2G_SPEC.naver_url)) ||
+            raw.match(new RegExp(N2G_SPEC.nmap_url));
+  const url = m ? m[0] : raw;
+  if (url.indexOf(N2G_SPEC.short_link) >= 0 || /[\[\]]/.test(url)) return null;
+  if (url.indexOf("/place/") >= 0 && new RegExp(N2G_SPEC.place_id).test(url)) return null;
+  let coords = n2gParams(url);
+  if (coords === undefined) return null;
+  if (!coords && url.indexOf("@") >= 0) {
+    const at = url.match(new RegExp(N2G_SPEC.at));
+    if (at) coords = [parseFloat(at[1]), parseFloat(at[2])];
+  }
+  if (!coords || !isFinite(coords[0]) || !isFinite(coords[1])) return null;
+  const f = {lat: n2gPyFloat(coords[0]), lng: n2gPyFloat(coords[1])};
+  f.q = f.lat + "," + f.lng;
+  const fill = t => t.replace(/\{(\w+)\}/g, (_, k) => f[k]);
+  return {lat: coords[0], lng: coords[1], name: "",
+          google_url: fill(N2G_SPEC.google_url), apple_url: fill(N2G_SPEC.apple_url)};
+}
+// </n2g:client>
+
+// 裝置上的轉換結果快取，以擷取出的 URL（短連結則為短碼）為 key
+const fm = FileManager.local();
+const cachePath = fm.joinPath(fm.documentsDirectory(), "naver2google-cache.json");
+
+function loadCache() {
+  try {
+    return fm.fileExists(cachePath) ? JSON.parse(fm.readString(cachePath)) : {};
+  } catch (e) {
+    return {};
+  }
+}
+
+function saveCache(cache) {
+  let keys = Object.keys(cache).sort((a, b) => cache[b].at - cache[a].at);
+  let kept = {};
+  for (let key of keys.slice(0, CACHE_MAX)) kept[key] = cache[key];
+  fm.writeString(cachePath, JSON.stringify(kept));
+}
+
+function cacheKey(url) {
+  let m = url.match(/naver\.me\/([A-Za-z0-9]+)/);
+  return m ? `naver.me/${m[1]}` : url;
+}
+
+// 呼叫 API；成功且伺服器允許快取（非 no-store）時寫入快取，並記下 max-age
+async function fetchResult(cache, key, cleanInput) {
+  let req = new Request(`${API}/convert?url=${encodeURIComponent(cleanInput)}`);
+  req.timeoutInterval = 15;
   let result = await req.loadJSON();
+  let headers = req.response?.headers || {};
+  let cacheControl = headers["Cache-Control"] || headers["cache-control"] || "";
+  if (!result.error && !cacheControl.includes("no-store")) {
+    let maxAge = cacheControl.match(/max-age=(\d+)/);
+    cache[key] = { at: Date.now(), maxAge: maxAge ? Number(maxAge[1]) : REFRESH_AFTER,
+                   result: result };
+    saveCache(cache);
+  }
+  return result;
+}
+
+let cleanInput = extractUrl(input);
+
+try {
+  let result = n2gLocal(input);
+  if (!result) {
+    // 短連結、地點 ID 等需要呼叫 API，先查本機快取
+    let cache = loadCache();
+    let key = cacheKey(cleanInput);
+    let entry = cache[key];
+    let age = entry ? Date.now() - entry.at : Infinity;
+    if (age < CACHE_DAYS * 86400 * 1000) {
+      result = entry.result;
+      // 立即使用快取；超過 max-age 才在背景更新（不等待，腳本結束時未完成就放棄）
+      if (age > (entry.maxAge ?? REFRESH_AFTER) * 1000) {
+        fetchResult(cache, key, cleanInput).catch(() => null);
+      }
+    } else {
+      try {
+        result = await fetchResult(cache, key, cleanInput);
+      } catch (e) {
+        if (!entry) throw e;
+        result = entry.result;   // 離線或伺服器無回應：使用過期的快取
+      }
+    }
+  }
 
   if (result.error) {
     let err = new Alert();
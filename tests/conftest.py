@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
+# Tests never touch Naver or the on-disk short-link store.
+os.environ.setdefault("N2G_SHORTLINK_DB", "")
+
+
+@pytest.fixture
+def fake_naver():
+    """bench/fake_naver.py with a fixed 100 ms latency."""
+    from fake_naver import FakeNaver
+
+    fake = FakeNaver(latency_ms=100, jitter_ms=0).start()
+    yield fake
+    fake.stop()
@@ -0,0 +1,24 @@
+import pytest
+
+import naver2google
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(naver2google, "ADMIN_TOKEN", "s3cret")
+    return naver2google.app.test_client()
+
+
+def test_bearer_header_is_accepted(client):
+    r = client.get("/admin/profile?seconds=0.1", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200
+
+
+def test_query_token_is_refused(client):
+    assert client.get("/admin/profile?seconds=0.1&token=s3cret").status_code == 403
+
+
+def test_admin_routes_off_without_token(client, monkeypatch):
+    monkeypatch.setattr(naver2google, "ADMIN_TOKEN", "")
+    r = client.get("/admin/profile", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 404
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import naver2google
+from naver2google import TTLCache
+
+INPUTS = ["https://map.naver.com/p/entry/place/1001", "https://map.naver.com/p/entry/place/1002",
+          "https://naver.me/abc1", "https://naver.me/abc2"]
+
+
+@pytest.fixture
+def fresh(fake_naver, monkeypatch):
+    fake_naver.latency_ms = 0
+    monkeypatch.setattr(naver2google, "PLACE_API", f"{fake_naver.url}/p/api/place/summary/{{}}")
+    monkeypatch.setattr(naver2google, "SHORTLINK_BASE", fake_naver.url)
+    monkeypatch.setattr(naver2google, "_place_cache", TTLCache(100, 3600))
+    monkeypatch.setattr(naver2google, "_shortlink_cache", TTLCache(100, 3600))
+    monkeypatch.setattr(naver2google, "_place_upstream", naver2google.Upstream("place"))
+    monkeypatch.setattr(naver2google, "_shortlink_upstream", naver2google.Upstream("shortlink"))
+
+
+def _misses():
+    return (naver2google._place_cache.stats()["misses"],
+            naver2google._shortlink_cache.stats()["misses"])
+
+
+def test_batch_counts_each_miss_once(fresh):
+    naver2google.convert_batch(INPUTS)
+    assert _misses() == (2, 2)
+
+
+def test_async_batch_counts_each_miss_once(fresh):
+    async def main():
+        try:
+            await naver2google.convert_batch_async(INPUTS)
+        finally:
+            await naver2google._close_async_client()
+
+    asyncio.run(main())
+    assert _misses() == (2, 2)
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from naver2google import _MISSING, CacheBackend, RedisCache, TTLCache
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_memory_cache_async_roundtrip():
+    cache = TTLCache(10, 60)
+
+    async def main():
+        await cache.set_async("a", [1, "x"])
+        return await cache.get_async("a"), await cache.get_async("b")
+
+    assert asyncio.run(main()) == ([1, "x"], _MISSING)
+
+
+def test_redis_cache_async_path_uses_redis_asyncio(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url",
+                        lambda url, **kw: fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(redis.asyncio.Redis, "from_url",
+                        lambda url, **kw: fakeredis.FakeAsyncRedis(server=server))
+    cache = RedisCache("redis://unused", "n2g:test:", 60)
+
+    async def main():
+        await cache.set_async("1", [37.5, 127.0])
+        found = await cache.get_many_async(["1", "2"])
+        await cache.aclose()
+        return found
+
+    assert asyncio.run(main()) == {"1": [37.5, 127.0]}
+    assert cache.get("1") == [37.5, 127.0]  # same data through the sync client
+    assert cache.stats()["hits"] == 2
+
+
+def test_unreachable_redis_is_a_miss():
+    cache = RedisCache("redis://127.0.0.1:1/0", "n2g:test:", 60)
+
+    async def main():
+        found = await cache.get_async("1")
+        await cache.aclose()
+        return found
+
+    assert asyncio.run(main()) is _MISSING
+    assert cache.stats()["errors"] == 1
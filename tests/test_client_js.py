@@ -0,0 +1,52 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import naver2google
+
+INPUTS = [
+    "https://map.naver.com/p/search/x?c=15.00,0,0,0,dh&lat=37.5665&lng=126.978",
+    "https://map.naver.com/p/search/x?lng=126.978&lat=37.5665",
+    "https://m.map.naver.com/map.naver?lat=-33.8&lng=151.2&level=3",
+    "https://map.naver.com/v5/@37.5665,126.978,15z",
+    "https://map.naver.com/p/@37.123456789012345,127.000000000000001,17z",
+    "nmap://place?lat=37.5&lng=127&name=%EC%84%9C%EC%9A%B8",
+    "[NAVER Map]\nSeoul\nhttps://map.naver.com/p/search/x?lat=37.5&lng=127.0",
+    "  https://map.naver.com/p/search/x?lat=1e2&lng=127.0  ",
+    "https://map.naver.com/p/search/x?lat=37.5&lng=127.0&lat=1.0",
+    "https://map.naver.com/p/search/x?lat=37.5",
+    "https://map.naver.com/p/search/x?lat=&lng=127.0&lat=37.5",
+    "https://map.naver.com/p/search/x?%6Cat=37.5&lng=127.0",
+    "https://map.naver.com/p/search/x?lat=0.0001&lng=-0.0",
+    "https://map.naver.com/p/entry/place/11591578?lat=37.5&lng=127.0",
+    "https://map.naver.com/p/entry/place/11591578",
+    "https://naver.me/abc123",
+    "Seoul Jung-gu Eulji-ro 13-gil 19",
+    "서울 중구 을지로13길 19",
+    "",
+]
+
+
+def test_scriptable_copy_is_up_to_date(tmp_path):
+    copy = tmp_path / "Naver2Google.js"
+    shutil.copy(naver2google.SCRIPTABLE_JS, copy)
+    assert naver2google.write_client_js(str(copy)) is False, \
+        "run `python naver2google.py --client-js`"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_client_js_matches_convert():
+    script = naver2google.client_js() + """
+const inputs = JSON.parse(require("fs").readFileSync(0, "utf8"));
+process.stdout.write(JSON.stringify(inputs.map(n2gLocal)));
+"""
+    out = subprocess.run(["node", "-e", script], input=json.dumps(INPUTS),
+                         capture_output=True, text=True, check=True).stdout
+    local = dict(zip(INPUTS, json.loads(out)))
+    handled = {raw: result for raw, result in local.items() if result is not None}
+    assert len(handled) >= 8   # the fixture still exercises the client path
+    for raw, result in handled.items():
+        expected = naver2google.convert(raw, with_name=False)
+        assert result == {key: expected[key] for key in result}, raw
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import naver2google
+
+SHARE_TEXT = "[NAVER 지도]\n을지로 노가리\n서울 중구 을지로13길 19\nhttps://naver.me/p1234"
+
+
+@pytest.fixture
+def failing_naver(fake_naver, monkeypatch):
+    """Every Naver endpoint answers 503; fresh breakers and caches."""
+    fake_naver.error_rate = 1.0
+    fake_naver.latency_ms = 0
+    monkeypatch.setattr(naver2google, "SHORTLINK_BASE", fake_naver.url)
+    monkeypatch.setattr(naver2google, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(naver2google, "_shortlink_upstream", naver2google.Upstream("shortlink"))
+    monkeypatch.setattr(naver2google, "_shortlink_cache", naver2google.TTLCache(10, 60))
+    return fake_naver
+
+
+def test_share_text_is_searched_before_the_breaker_opens(failing_naver):
+    result = naver2google.convert(SHARE_TEXT)
+    assert naver2google._shortlink_upstream.breaker.state == "closed"
+    assert result["google_url"].startswith("https://www.google.com/maps/search/")
+    assert "을지로 노가리" in result["name"]
+
+
+def test_async_share_text_fallback(failing_naver):
+    async def main():
+        try:
+            return await naver2google.convert_async(SHARE_TEXT)
+        finally:
+            await naver2google._close_async_client()
+
+    assert "을지로 노가리" in asyncio.run(main())["name"]
+
+
+def test_bare_short_link_still_fails(failing_naver):
+    with pytest.raises(naver2google.UpstreamError):
+        naver2google.convert("https://naver.me/p1234")
+
+
+def test_streamed_share_text_falls_back_too(failing_naver):
+    (line,) = naver2google.convert_stream([SHARE_TEXT])
+    assert line["index"] == 0 and "을지로 노가리" in line["name"]
+
+
+def test_async_streamed_share_text_falls_back_too(failing_naver):
+    async def main():
+        try:
+            return [line async for line in naver2google.convert_stream_async([SHARE_TEXT])]
+        finally:
+            await naver2google._close_async_client()
+
+    (line,) = asyncio.run(main())
+    assert line["index"] == 0 and "을지로 노가리" in line["name"]
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+import naver2google
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+def test_forked_child_rebuilds_per_process_state():
+    parent_session = naver2google._get_session()
+    parent_pool = naver2google._get_hedge_pool()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child: report and leave without running pytest's teardown
+        fresh = (naver2google._session is None and naver2google._hedge_pool is None
+                 and naver2google._get_session() is not parent_session
+                 and naver2google._get_hedge_pool() is not parent_pool)
+        os.write(write, b"1" if fresh else b"0")
+        os._exit(0)
+    os.close(write)
+    assert os.read(read, 1) == b"1"
+    os.waitpid(pid, 0)
+    assert naver2google._get_session() is parent_session
@@ -0,0 +1,48 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import naver2google
+from naver2google import Hedger, Upstream
+
+
+@pytest.fixture
+def busy_pool(monkeypatch):
+    """A one-thread hedge pool, blocked for 0.3 s."""
+    pool = ThreadPoolExecutor(1)
+    release = threading.Event()
+    pool.submit(release.wait, 0.3)
+    monkeypatch.setattr(naver2google, "_get_hedge_pool", lambda: pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def hedger(monkeypatch):
+    hedger = Hedger(Upstream("test"), percentile=95, budget=1.0)
+    hedger.calls = 100
+    monkeypatch.setattr(hedger, "delay", lambda: 0.1)
+    return hedger
+
+
+def test_queue_time_does_not_trigger_a_hedge(busy_pool, hedger):
+    def fast():
+        time.sleep(0.02)
+        return "ok"
+
+    assert naver2google._hedged(hedger, fast) == "ok"
+    assert hedger.hedged == 0
+
+
+def test_slow_attempt_is_hedged(hedger):
+    calls = []
+
+    def slow_then_fast():
+        calls.append(None)
+        time.sleep(0.5 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    assert naver2google._hedged(hedger, slow_then_fast) == 2
+    assert (hedger.hedged, hedger.won) == (1, 1)
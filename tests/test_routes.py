@@ -0,0 +1,75 @@
+import ast
+import asyncio
+import inspect
+import textwrap
+
+import httpx
+import pytest
+
+import naver2google
+
+COORDS_URL = "https://map.naver.com/p/search/x?c=15.00,0,0,0,dh&lat=37.5&lng=127.0"
+CASES = [
+    ("GET", "/convert", {"url": COORDS_URL}, None),
+    ("GET", "/convert", {}, None),
+    ("GET", "/go", {"url": COORDS_URL, "target": "apple"}, None),
+    ("GET", "/go", {}, None),
+    ("POST", "/convert/batch", {}, f"{COORDS_URL}\n"),
+    ("POST", "/convert/batch", {"stream": "1"}, f"{COORDS_URL}\n"),
+    ("GET", "/admin/profile", {}, None),
+    ("GET", "/health", {}, None),
+    ("GET", "/nope", {}, None),
+    ("GET", "/convert/batch", {}, None),
+    ("POST", "/go", {}, None),
+]
+
+
+def _flask(method, path, params, body, headers=None):
+    r = naver2google.app.test_client().open(path, method=method, query_string=params,
+                                            data=body, headers=headers)
+    return r.status_code, r.headers.get("Content-Type"), r.headers.get("Location"), r.get_data()
+
+
+def _asgi(method, path, params, body, headers=None):
+    async def main():
+        transport = httpx.ASGITransport(app=naver2google.asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            r = await client.request(method, path, params=params, content=body,
+                                     headers=headers)
+        return r.status_code, r.headers.get("content-type"), r.headers.get("location"), r.content
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("method,path,params,body", CASES)
+def test_flask_and_asgi_answer_alike(method, path, params, body):
+    assert _flask(method, path, params, body) == _asgi(method, path, params, body)
+
+
+@pytest.mark.parametrize("send", [_flask, _asgi])
+def test_etag_revalidates(send):
+    body = send("GET", "/convert", {"url": COORDS_URL}, None)[3]
+    etag = naver2google._revalidate(body, None)[0]["ETag"]
+    status, _, _, body = send("GET", "/convert", {"url": COORDS_URL}, None,
+                              {"If-None-Match": etag})
+    assert (status, body) == (304, b"")
+
+
+def _awaits(fn):
+    tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    return [node.value for node in ast.walk(tree) if isinstance(node, ast.Await)]
+
+
+def test_blocking_io_never_awaits():
+    # _run_inline() can only drive routes whose awaits finish synchronously
+    for name, method in vars(naver2google._BlockingIO).items():
+        if inspect.iscoroutinefunction(method):
+            assert not _awaits(method), name
+
+
+@pytest.mark.parametrize("route", [route for _, route in naver2google.ROUTES.values()])
+def test_routes_only_await_io(route):
+    for value in _awaits(route):
+        assert (isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute)
+                and isinstance(value.func.value, ast.Name) and value.func.value.id == "io"), \
+            f"{route.__name__} awaits {ast.unparse(value)}"
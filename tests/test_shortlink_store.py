@@ -0,0 +1,38 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from naver2google import ShortLinkStore
+
+
+def test_locked_database_does_not_stall_the_event_loop(tmp_path):
+    store = ShortLinkStore(str(tmp_path / "shortlinks.sqlite3"))
+    store.set("abc", "https://map.naver.com/p/entry/place/1")
+
+    # another worker holds the write lock for 0.3 s
+    other = sqlite3.connect(store.path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, other.rollback).start()
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        started = time.monotonic()
+        await store.set_async("def", "https://map.naver.com/p/entry/place/2")
+        waited = time.monotonic() - started
+        ticker.cancel()
+        return waited, ticks
+
+    waited, ticks = asyncio.run(main())
+    assert waited >= 0.25
+    assert ticks >= 10
+    assert asyncio.run(store.get_async("def")) == "https://map.naver.com/p/entry/place/2"
+    other.close()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from naver2google import AsyncSingleFlight
+
+
+def test_followers_share_one_call():
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fetch, "k") for _ in range(5)))
+
+    assert asyncio.run(main()) == ["K"] * 5
+    assert calls == ["k"]
+    assert flight.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight("test")
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def fetch():
+            gate.set()
+            await asyncio.sleep(0.05)
+            return "place"
+
+        leader = asyncio.ensure_future(flight.do("4242", fetch))
+        await gate.wait()
+        follower = asyncio.ensure_future(flight.do("4242", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "place"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller():
+    flight = AsyncSingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def main():
+        return await asyncio.gather(flight.do("k", fetch), flight.do("k", fetch),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_call_finishes_after_every_caller_is_cancelled():
+    flight = AsyncSingleFlight("test")
+    finished = []
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        finished.append(True)
+        return 1
+
+    async def main():
+        caller = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert finished == [True]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_convert_async_survives_cancelled_leader(fake_naver, monkeypatch):
+    import naver2google
+
+    monkeypatch.setattr(naver2google, "PLACE_API",
+                        f"{fake_naver.url}/p/api/place/summary/{{}}")
+    url = "https://map.naver.com/p/entry/place/4242"
+
+    async def main():
+        leader = asyncio.ensure_future(naver2google.convert_async(url))
+        await asyncio.sleep(0.02)
+        follower = asyncio.ensure_future(naver2google.convert_async(url))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        try:
+            return await follower
+        finally:
+            await naver2google._close_async_client()
+
+    result = asyncio.run(main())
+    assert result["name"] == "장소 4242"
@@ -0,0 +1,36 @@
+import json
+import time
+
+import pytest
+
+import naver2google
+from naver2google import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(naver2google, "_place_cache", TTLCache(100, 3600))
+    monkeypatch.setattr(naver2google, "_shortlink_cache", TTLCache(100, 3600))
+
+
+def test_malformed_entries_are_dropped_on_load_and_dump(tmp_path):
+    path = tmp_path / "snapshot.json"
+    now = time.time()
+    path.write_text(json.dumps({
+        "places": {"1": [37.5, 127.0, "x"], "2": [37.5, 127.0, "ok", now], "3": "junk"},
+        "shortlinks": {"abc": "https://map.naver.com/p/entry/place/2", "bad": 7},
+    }))
+    assert naver2google.load_snapshot(str(path)) == 2
+    assert naver2google.dump_snapshot(str(path)) == 2
+    data = json.loads(path.read_text())
+    assert list(data["places"]) == ["2"]
+    assert list(data["shortlinks"]) == ["abc"]
+
+
+def test_failed_dump_is_reported_not_raised(monkeypatch, capsys):
+    def broken(path):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(naver2google, "dump_snapshot", broken)
+    naver2google._save_snapshot()
+    assert "boom" in capsys.readouterr().err
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import naver2google
+from naver2google import CircuitOpen, Upstream
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(naver2google, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(naver2google, "RETRIES", 2)
+    monkeypatch.setattr(naver2google, "BREAKER_FAILURES", 5)
+
+
+def answers(*statuses):
+    """A requests-style fn returning these status codes in turn."""
+    calls = []
+
+    def fn(url, timeout):
+        calls.append(timeout)
+        return SimpleNamespace(status_code=statuses[len(calls) - 1])
+
+    return fn, calls
+
+
+def test_each_attempt_is_its_own_sample():
+    upstream = Upstream("test")
+    fn, calls = answers(503, 502, 200)
+    assert upstream.call(fn, "u").status_code == 200
+    assert len(calls) == 3
+    assert len(upstream.latency) == 3
+    assert upstream.calls == 3 and upstream.errors == 2
+
+
+def test_retries_stop_when_the_circuit_opens():
+    upstream = Upstream("test")
+    fn, calls = answers(*[503] * 10)
+    assert upstream.call(fn, "u").status_code == 503   # 3 failed attempts
+    with pytest.raises(CircuitOpen):
+        upstream.call(fn, "u")                         # 2 more open the breaker
+    assert len(calls) == 5
+
+
+def test_client_errors_are_not_retried():
+    upstream = Upstream("test")
+    fn, calls = answers(404)
+    assert upstream.call(fn, "u").status_code == 404
+    assert len(calls) == 1
+
+
+def test_transport_errors_are_retried_async():
+    upstream = Upstream("test")
+    attempts = []
+
+    async def fn(url, timeout):
+        attempts.append(url)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return SimpleNamespace(status_code=200)
+
+    assert asyncio.run(upstream.call_async(fn, "u")).status_code == 200
+    assert len(attempts) == 3 and upstream.errors == 2